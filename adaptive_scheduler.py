@@ -0,0 +1,90 @@
+# adaptive_scheduler.py — decides when the inference worker should analyze the next frame
+#
+# - skip:   a 32x24 gray thumbnail is compared with the last analyzed one; frames that barely
+#           changed are not analyzed (but at least once every max_skip_s seconds)
+# - rate:   the analysis interval shrinks towards min_interval while the stable emotion is changing
+#           and grows towards max_interval while it is steady
+# - budget: the interval never drops below latency / cpu_budget, so one session keeps inference
+#           busy for at most cpu_budget of the time (0.25 = a quarter of a core)
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from emotion_analysis import EmotionSmoother
+from frames import Frame
+
+THUMB_SIZE = (32, 24)
+
+
+class AdaptiveScheduler:
+    """Frame-skip + pacing policy for inference_worker.InferenceWorker (one per session)."""
+    def __init__(self, min_interval=0.2, max_interval=3.0, cpu_budget=0.5, diff_threshold=3.0,
+                 max_skip_s=5.0, poll_interval=0.1, smoothing=0.3):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.cpu_budget = cpu_budget
+        self.diff_threshold = diff_threshold
+        self.max_skip_s = max_skip_s
+        self.poll_interval = poll_interval
+        self.smoothing = smoothing
+        self.smoother = EmotionSmoother(window_size=5)
+        self.volatility = 1.0        # EMA of "stable emotion changed" per analysis, starts eager
+        self.latency = 0.0           # EMA of inference latency (s)
+        self.interval = min_interval
+        self.skipped = 0
+        self.analyzed = 0
+        self.last_diff = 0.0
+        self._thumb = np.empty(THUMB_SIZE[::-1], dtype=np.float32)
+        self._last_thumb = None
+        self._last_analyzed = 0.0
+        self._stable = None
+        self._lock = threading.Lock()
+
+    def should_analyze(self, frame, now=None):
+        """Cheap change check on the newest frame; False means skip it (nothing meaningful moved)."""
+        now = time.time() if now is None else now
+        frame = Frame.wrap(frame)
+        small = cv2.resize(frame.data, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        gray = small if small.ndim == 2 else Frame(small, frame.order).gray(name="thumb_gray")
+        np.copyto(self._thumb, gray, casting="unsafe")
+        if self._last_thumb is None or now - self._last_analyzed >= self.max_skip_s:
+            self.last_diff = float("inf")
+        else:
+            self.last_diff = float(np.mean(np.abs(self._thumb - self._last_thumb)))
+        if self.last_diff < self.diff_threshold:
+            self.skipped += 1
+            return False
+        if self._last_thumb is None:
+            self._last_thumb = np.empty_like(self._thumb)
+        self._last_thumb[...] = self._thumb
+        self._last_analyzed = now
+        return True
+
+    def observe(self, results, latency):
+        """Feed the results [(ts, emotion, confidence, ...), ...] and latency of one analysis."""
+        with self._lock:
+            self.analyzed += 1
+            a = self.smoothing
+            self.latency = latency if self.analyzed == 1 else (1 - a) * self.latency + a * latency
+            for r in results:
+                self.smoother.update(r[1], r[2])
+            stable = self.smoother.get_stable_emotion()[0]
+            changed = 1.0 if self._stable is not None and stable != self._stable else 0.0
+            self._stable = stable
+            self.volatility = (1 - a) * self.volatility + a * changed
+            # changing -> min_interval, steady -> max_interval, never above the CPU budget
+            target = self.max_interval - (self.max_interval - self.min_interval) * min(1.0, 2.0 * self.volatility)
+            if self.cpu_budget:
+                target = max(target, self.latency / self.cpu_budget)
+            self.interval = target
+
+    def next_delay(self, latency):
+        """Seconds to wait before looking at the next frame."""
+        return max(0.0, self.interval - latency)
+
+    def stats(self):
+        return {"interval_s": round(self.interval, 3), "volatility": round(self.volatility, 3),
+                "skipped": self.skipped, "last_diff": round(self.last_diff, 2) if np.isfinite(self.last_diff) else None,
+                "cpu_share": round(self.latency / self.interval, 3) if self.interval else None}
@@ -0,0 +1,177 @@
+# asr.py — pluggable speech-to-text backends with streaming partial transcripts
+#
+# Backends:
+#   vosk   — offline, CPU, incremental (pip install vosk; model dir in VOSK_MODEL_PATH)
+#   google — speech_recognition's recognize_google (network, transcribes only at the end)
+# ASR_BACKEND=vosk|google forces one; otherwise the first available in that order is used.
+import json
+import os
+import threading
+
+SAMPLE_RATE = 16000
+
+
+def _sr():
+    """speech_recognition, imported on first use (keeps `import asr` cheap)."""
+    import speech_recognition
+    return speech_recognition
+
+
+DEFAULT_VOSK_MODEL = os.path.join("models", "vosk-model-small-en-us-0.15")
+
+
+class VoskBackend:
+    name = "vosk"
+    _model = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def model_path():
+        return os.environ.get("VOSK_MODEL_PATH", DEFAULT_VOSK_MODEL)
+
+    @classmethod
+    def available(cls):
+        try:
+            import vosk  # noqa: F401
+        except Exception:
+            return False
+        return os.path.isdir(cls.model_path())
+
+    @classmethod
+    def load(cls):
+        """Vosk model, loaded once per process."""
+        if cls._model is None:
+            with cls._lock:
+                if cls._model is None:
+                    import vosk
+                    vosk.SetLogLevel(-1)
+                    cls._model = vosk.Model(cls.model_path())
+        return cls._model
+
+    def session(self, sample_rate=SAMPLE_RATE, sample_width=2):
+        return VoskSession(self.load(), sample_rate)
+
+
+class VoskSession:
+    """Feeds 16-bit mono PCM into a KaldiRecognizer; accept() returns the running transcript."""
+    def __init__(self, model, sample_rate):
+        import vosk
+        self.rec = vosk.KaldiRecognizer(model, sample_rate)
+        self.committed = []
+        self.partial = ""
+
+    def text(self):
+        return " ".join(self.committed + ([self.partial] if self.partial else []))
+
+    def accept(self, pcm):
+        if self.rec.AcceptWaveform(pcm):
+            final = json.loads(self.rec.Result()).get("text", "")
+            if final:
+                self.committed.append(final)
+            self.partial = ""
+        else:
+            self.partial = json.loads(self.rec.PartialResult()).get("partial", "")
+        return self.text()
+
+    def finish(self):
+        final = json.loads(self.rec.FinalResult()).get("text", "")
+        if final:
+            self.committed.append(final)
+        self.partial = ""
+        return self.text()
+
+
+class GoogleBackend:
+    name = "google"
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def session(self, sample_rate=SAMPLE_RATE, sample_width=2):
+        return GoogleSession(sample_rate, sample_width)
+
+
+class GoogleSession:
+    """Buffers audio and makes one recognize_google call in finish(); no partials."""
+    def __init__(self, sample_rate, sample_width):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.buf = bytearray()
+
+    def accept(self, pcm):
+        self.buf.extend(pcm)
+        return None
+
+    def finish(self):
+        sr = _sr()
+        audio = sr.AudioData(bytes(self.buf), self.sample_rate, self.sample_width)
+        try:
+            return sr.Recognizer().recognize_google(audio)
+        except sr.UnknownValueError:
+            return ""
+
+
+BACKENDS = {"vosk": VoskBackend, "google": GoogleBackend}
+
+
+def get_backend(name=None):
+    """Backend instance by name / ASR_BACKEND, else the first available (offline preferred)."""
+    name = name or os.environ.get("ASR_BACKEND")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown ASR backend: {name}")
+        return BACKENDS[name]()
+    for cls in BACKENDS.values():
+        if cls.available():
+            return cls()
+    return GoogleBackend()
+
+
+def open_microphone():
+    return _sr().Microphone(sample_rate=SAMPLE_RATE)
+
+
+def transcribe_source(source, duration, on_partial=None, backend=None, start_timeout=None, energy_threshold=300):
+    """
+    Stream `duration` seconds from an opened speech_recognition source (Microphone or AudioFile)
+    chunk by chunk into the backend. on_partial(text) fires whenever the running transcript changes.
+    start_timeout: wait at most that many seconds for a chunk louder than energy_threshold (RMS,
+    speech_recognition's default) and raise TimeoutError if none comes; duration then counts from it.
+    """
+    backend = backend if backend is not None and not isinstance(backend, str) else get_backend(backend)
+    first = _wait_for_speech(source, start_timeout, energy_threshold) if start_timeout is not None else None
+    session = backend.session(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+    max_chunks = int(duration * source.SAMPLE_RATE / source.CHUNK) + 1
+    last = ""
+    for _ in range(max_chunks):
+        if first is not None:
+            pcm, first = first, None
+        else:
+            pcm = source.stream.read(source.CHUNK)
+        if not pcm:
+            break
+        partial = session.accept(pcm)
+        if partial and partial != last and on_partial is not None:
+            on_partial(partial)
+            last = partial
+    return session.finish()
+
+
+def _wait_for_speech(source, timeout, energy_threshold):
+    """First chunk louder than energy_threshold within timeout seconds (silence before it is dropped)."""
+    from audio_capture import chunk_rms
+    for _ in range(int(timeout * source.SAMPLE_RATE / source.CHUNK) + 1):
+        pcm = source.stream.read(source.CHUNK)
+        if not pcm:
+            break
+        if chunk_rms(pcm) > energy_threshold:
+            return pcm
+    raise TimeoutError(f"no speech within {timeout}s")
+
+
+def transcribe_microphone(duration=5, on_partial=None, backend=None, start_timeout=None):
+    """Record from the default microphone for ~duration seconds, transcribing while it records."""
+    with open_microphone() as source:
+        return transcribe_source(source, duration, on_partial=on_partial, backend=backend,
+                                 start_timeout=start_timeout)
@@ -0,0 +1,201 @@
+# audio_capture.py — long-lived microphone capture with energy VAD and utterance segmentation
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+
+import asr
+
+
+class Segment:
+    """One finished utterance: raw 16-bit mono PCM plus timing."""
+    __slots__ = ("start", "end", "pcm", "sample_rate", "sample_width")
+
+    def __init__(self, start, end, pcm, sample_rate, sample_width):
+        self.start = start
+        self.end = end
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    @property
+    def duration(self):
+        return len(self.pcm) / (self.sample_rate * self.sample_width)
+
+
+def chunk_rms(pcm):
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+
+class AudioCaptureService:
+    """
+    Keeps the microphone open, calibrates the noise floor once, and cuts speech into utterances
+    with an energy VAD. While an answer is active (begin_answer/end_answer) each finished utterance
+    goes straight to handler(segment) on a consumer thread, so transcription overlaps speaking.
+    """
+    def __init__(self, handler, start_ms=150, end_silence_ms=700, preroll_ms=300,
+                 max_segment_s=30.0, calibrate_s=1.0, ring_seconds=30.0, threshold_ratio=2.5,
+                 min_threshold=150.0, open_source=None):
+        self.handler = handler
+        self.start_ms = start_ms
+        self.end_silence_ms = end_silence_ms
+        self.preroll_ms = preroll_ms
+        self.max_segment_s = max_segment_s
+        self.calibrate_s = calibrate_s
+        self.ring_seconds = ring_seconds
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+        self.open_source = open_source or asr.open_microphone
+
+        self.noise_rms = None       # calibrated once, then tracked slowly during silence
+        self.threshold = None
+        self.ring = None            # recent raw chunks (pre-roll + history)
+        self.error = None
+        self._answering = False
+        self._on_segment = None     # optional per-answer listener (e.g. a session recorder)
+        self._current = None        # chunks of the utterance in progress
+        self._current_start = 0.0
+        self._voiced_ms = 0.0
+        self._silence_ms = 0.0
+        self._flush = threading.Event()
+        self._segments = queue.Queue()
+        self._results = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    # ---- lifecycle
+    def start(self):
+        if self._threads:
+            return self
+        self._threads = [threading.Thread(target=self._capture_loop, daemon=True),
+                         threading.Thread(target=self._consume_loop, daemon=True)]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._segments.put(None)
+        for t in self._threads:
+            t.join(timeout=2)
+        self._threads = []
+
+    def begin_answer(self, on_segment=None):
+        """
+        Start collecting utterances for a new answer (no re-open, no re-calibration).
+        on_segment(segment) also receives every raw utterance of this answer.
+        """
+        with self._lock:
+            self._results = []
+            self._on_segment = on_segment
+            self._current = None
+            self._voiced_ms = self._silence_ms = 0.0
+            self._answering = True
+
+    def end_answer(self, timeout=30.0):
+        """Close the utterance in progress, wait for its handler, return [handler result, ...]."""
+        self._flush.set()
+        deadline = time.monotonic() + 2.0
+        while self._flush.is_set() and time.monotonic() < deadline and not self.error:
+            time.sleep(0.02)
+        with self._lock:
+            self._answering = False
+        deadline = time.monotonic() + timeout
+        while self._segments.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.02)
+        with self._lock:
+            return list(self._results)
+
+    # ---- internals
+    def _capture_loop(self):
+        try:
+            with self.open_source() as source:
+                chunk_ms = 1000.0 * source.CHUNK / source.SAMPLE_RATE
+                self.ring = deque(maxlen=max(1, int(self.ring_seconds * 1000 / chunk_ms)))
+                self._calibrate(source, chunk_ms)
+                while not self._stop_event.is_set():
+                    pcm = source.stream.read(source.CHUNK)
+                    if not pcm:
+                        break
+                    self._on_chunk(pcm, chunk_ms, source)
+        except Exception as e:
+            self.error = f"Audio capture error: {e}"
+            traceback.print_exc()
+        finally:
+            self._flush.clear()
+
+    def _calibrate(self, source, chunk_ms):
+        levels = []
+        for _ in range(max(1, int(self.calibrate_s * 1000 / chunk_ms))):
+            pcm = source.stream.read(source.CHUNK)
+            self.ring.append(pcm)
+            levels.append(chunk_rms(pcm))
+        self.noise_rms = float(np.median(levels))
+        self._update_threshold()
+
+    def _update_threshold(self):
+        self.threshold = max(self.min_threshold, self.noise_rms * self.threshold_ratio)
+
+    def _on_chunk(self, pcm, chunk_ms, source):
+        self.ring.append(pcm)
+        rms = chunk_rms(pcm)
+        speech = rms > self.threshold
+        with self._lock:
+            if self._current is None:
+                if not speech:
+                    # follow slow changes in room noise while nobody is speaking
+                    self.noise_rms = 0.95 * self.noise_rms + 0.05 * rms
+                    self._update_threshold()
+                    self._voiced_ms = 0.0
+                else:
+                    self._voiced_ms += chunk_ms
+                    if self._answering and self._voiced_ms >= self.start_ms:
+                        n_pre = int((self.preroll_ms + self._voiced_ms) / chunk_ms)
+                        self._current = list(self.ring)[-n_pre:]
+                        self._current_start = time.time() - len(self._current) * chunk_ms / 1000.0
+                        self._silence_ms = 0.0
+            else:
+                self._current.append(pcm)
+                self._silence_ms = 0.0 if speech else self._silence_ms + chunk_ms
+                too_long = len(self._current) * chunk_ms >= self.max_segment_s * 1000
+                if self._silence_ms >= self.end_silence_ms or too_long:
+                    self._emit(source)
+            if self._flush.is_set():
+                if self._current is not None:
+                    self._emit(source)
+                self._flush.clear()
+
+    def _emit(self, source):
+        seg = Segment(self._current_start, time.time(), b"".join(self._current), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        self._current = None
+        self._voiced_ms = self._silence_ms = 0.0
+        self._segments.put(seg)
+
+    def _consume_loop(self):
+        while True:
+            seg = self._segments.get()
+            try:
+                if seg is None:
+                    return
+                if self._on_segment is not None:
+                    # e.g. SessionRecorder.add_audio; a failure there must not stop transcription
+                    try:
+                        self._on_segment(seg)
+                    except Exception as e:
+                        print("Segment callback error:", e)
+                        traceback.print_exc()
+                try:
+                    result = self.handler(seg)
+                except Exception as e:
+                    print("Segment handler error:", e)
+                    result = None
+                if result is not None:
+                    with self._lock:
+                        self._results.append(result)
+            finally:
+                self._segments.task_done()
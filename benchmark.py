@@ -0,0 +1,196 @@
+# benchmark.py — headless replay benchmark for the emotion + speech pipelines
+#
+#   python benchmark.py --frames recorded_frames/ --wav answer1.wav answer2.wav --out bench.json
+#   python benchmark.py --video session.mp4 --limit 300 --batch 8
+#
+# Prints (or writes) one JSON document so CI can diff runs.
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from unittest import mock
+
+import cv2
+import numpy as np
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+DEFAULT_TRANSCRIPT = "I enjoy solving hard problems with my team and I learned a lot from my last project"
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if the platform can't tell."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except Exception:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+def summarize(samples):
+    """Latency list (seconds) -> count / mean / percentiles in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ms = np.asarray(samples) * 1000.0
+    p50, p90, p95, p99 = np.percentile(ms, [50, 90, 95, 99])
+    return {"count": len(samples), "mean_ms": round(float(ms.mean()), 3), "p50_ms": round(float(p50), 3),
+            "p90_ms": round(float(p90), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(ms.max()), 3)}
+
+
+def iter_frames(frames_dir=None, video=None, limit=None):
+    """Yield BGR frames from a folder of images or a video file (read one at a time)."""
+    count = 0
+    if frames_dir:
+        paths = sorted(p for p in glob.glob(os.path.join(frames_dir, "*")) if p.lower().endswith(IMAGE_EXTS))
+        for path in paths:
+            if limit and count >= limit:
+                return
+            img = cv2.imread(path)
+            if img is not None:
+                count += 1
+                yield img
+    if video:
+        cap = cv2.VideoCapture(video)
+        try:
+            while not (limit and count >= limit):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                count += 1
+                yield frame
+        finally:
+            cap.release()
+
+
+def bench_emotion(frames_dir=None, video=None, limit=None, batch=0, track=False):
+    from emotion_analysis import analyze_emotion, analyze_emotions_batch, EmotionSmoother
+    from face_tracking import FaceTracker
+    from frames import Frame
+
+    stages = {"decode": [], "analyze_emotion": [], "smoother": []}
+    smoother = EmotionSmoother(window_size=5)
+    tracker = FaceTracker() if track else None
+    labels = {}
+    frames_for_batch = []
+    n = 0
+    t_start = time.perf_counter()
+    it = iter_frames(frames_dir, video, limit)
+    while True:
+        t0 = time.perf_counter()
+        frame = next(it, None)
+        if frame is None:
+            break
+        stages["decode"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        emo, conf = analyze_emotion(Frame(frame, "BGR"), tracker=tracker)
+        stages["analyze_emotion"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        smoother.update(emo, conf)
+        smoother.get_stable_emotion()
+        stages["smoother"].append(time.perf_counter() - t0)
+
+        labels[emo] = labels.get(emo, 0) + 1
+        if batch and len(frames_for_batch) < 4 * batch:
+            frames_for_batch.append(frame)
+        n += 1
+    wall = time.perf_counter() - t_start
+
+    result = {
+        "frames": n,
+        "wall_s": round(wall, 3),
+        "fps": round(n / sum(stages["analyze_emotion"]), 2) if n else 0.0,
+        "labels": labels,
+        "stages": {name: summarize(samples) for name, samples in stages.items()},
+    }
+    if batch and frames_for_batch:
+        per_batch = []
+        for i in range(0, len(frames_for_batch), batch):
+            chunk = [Frame(f, "BGR") for f in frames_for_batch[i:i + batch]]
+            t0 = time.perf_counter()
+            analyze_emotions_batch(chunk)
+            per_batch.append(time.perf_counter() - t0)
+        result["batch"] = {"size": batch, "stages": summarize(per_batch),
+                           "fps": round(len(frames_for_batch) / sum(per_batch), 2)}
+    return result
+
+
+def bench_speech(wav_paths, transcript=DEFAULT_TRANSCRIPT, duration=5):
+    """Replay WAVs through speech_analysis.record_and_analyze with the microphone and Google recognizer stubbed."""
+    import speech_recognition as sr
+    import asr
+    import speech_analysis
+    from feedback_generator import generate_feedback
+
+    stages = {"record_and_analyze": [], "feedback": []}
+    moods = {}
+    for path in wav_paths:
+        sidecar = os.path.splitext(path)[0] + ".txt"
+        text = open(sidecar, encoding="utf-8").read().strip() if os.path.exists(sidecar) else transcript
+        with mock.patch.object(asr, "open_microphone", lambda p=path: sr.AudioFile(p)), \
+                mock.patch.dict(os.environ, {"ASR_BACKEND": "google"}), \
+                mock.patch.object(sr.Recognizer, "recognize_google", lambda self, audio, t=text, **kw: t):
+            t0 = time.perf_counter()
+            text_out, mood = speech_analysis.record_and_analyze(duration=duration)
+            stages["record_and_analyze"].append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        generate_feedback(text_out or "")
+        stages["feedback"].append(time.perf_counter() - t0)
+        moods[mood] = moods.get(mood, 0) + 1
+    return {"files": len(wav_paths), "moods": moods,
+            "stages": {name: summarize(samples) for name, samples in stages.items()}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded frames / audio through the trainer pipelines.")
+    parser.add_argument("--frames", help="folder of recorded frames (jpg/png)")
+    parser.add_argument("--video", help="video file to replay")
+    parser.add_argument("--wav", nargs="*", default=[], help="WAV files for the speech path")
+    parser.add_argument("--transcript", default=DEFAULT_TRANSCRIPT, help="stub recognizer text (or <wav>.txt next to each file)")
+    parser.add_argument("--limit", type=int, default=0, help="max frames to replay (0 = all)")
+    parser.add_argument("--batch", type=int, default=0, help="also measure analyze_emotions_batch with this batch size")
+    parser.add_argument("--track", action="store_true", help="use a FaceTracker for analyze_emotion")
+    parser.add_argument("--backend", choices=("keras", "onnx", "onnx-int8"), help="emotion backend (default: EMOTION_BACKEND)")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from model_registry import set_backend, warm_models
+    if args.backend:
+        set_backend(args.backend)
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model": warm_models().stats,
+    }
+    if args.frames or args.video:
+        report["emotion"] = bench_emotion(args.frames, args.video, args.limit or None, args.batch, args.track)
+    if args.wav:
+        report["speech"] = bench_speech(args.wav, transcript=args.transcript)
+    report["peak_rss_mb"] = peak_rss_mb()
+    # stage spans recorded inside the pipeline (resize / color / detect / classify ...)
+    from perf_metrics import METRICS
+    report["metrics"] = METRICS.snapshot()
+
+    out = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(out)
+    else:
+        print(out)
+    return report
+
+
+if __name__ == "__main__":
+    main()
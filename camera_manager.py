@@ -0,0 +1,245 @@
+# camera_manager.py — probe the webcam once, keep one capture open, share its frames
+#
+# probe() tries (backend, index) pairs once and caches the working one on disk
+# (CAMERA_CACHE, default ~/.ai_interview_trainer/camera.json); later runs open it directly.
+# SharedCamera reads the device on one thread (which also keeps the driver queue drained)
+# and hands the newest frame to any number of consumers without reopening the device.
+import json
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".ai_interview_trainer", "camera.json")
+
+
+def default_backends():
+    """(name, cv2 backend id) pairs to probe on this platform, preferred first."""
+    if sys.platform.startswith("win"):
+        names = ("CAP_DSHOW", "CAP_MSMF", "CAP_ANY")
+    elif sys.platform == "darwin":
+        names = ("CAP_AVFOUNDATION", "CAP_ANY")
+    else:
+        names = ("CAP_V4L2", "CAP_ANY")
+    return [(name, getattr(cv2, name)) for name in names if hasattr(cv2, name)]
+
+
+def cache_path():
+    return os.environ.get("CAMERA_CACHE", DEFAULT_CACHE)
+
+
+def load_cached():
+    try:
+        with open(cache_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(config):
+    path = cache_path()
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+    except OSError as e:
+        print("Could not cache camera config:", e)
+
+
+def try_open(index, backend):
+    """Open + read one frame; returns (VideoCapture or None, info string)."""
+    cap = cv2.VideoCapture(index, backend)
+    if not cap.isOpened():
+        cap.release()
+        return None, "not opened"
+    ret, frame = cap.read()
+    if not ret or frame is None:
+        cap.release()
+        return None, "opened but read failed"
+    return cap, f"read OK shape={frame.shape}"
+
+
+def probe(indices=range(6), backends=None, force=False, verbose=False):
+    """
+    Working camera as {"index", "backend", "backend_name", "width", "height", "fps"}, or None.
+    Uses the on-disk cache unless force=True; a fresh result is written back to it.
+    """
+    if not force:
+        cached = load_cached()
+        if cached:
+            return cached
+    for name, backend in backends or default_backends():
+        if verbose:
+            print("=== backend:", name, "===")
+        for index in indices:
+            cap, info = try_open(index, backend)
+            if verbose:
+                print(f"index {index}: {info}")
+            if cap is None:
+                continue
+            config = {"index": index, "backend": backend, "backend_name": name,
+                      "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                      "fps": round(float(cap.get(cv2.CAP_PROP_FPS) or 0.0), 2)}
+            cap.release()
+            save_cached(config)
+            return config
+    return None
+
+
+class SharedCamera:
+    """
+    One long-lived VideoCapture read on a background thread. Consumers get the newest frame
+    (BGR, treat as read-only — it is shared) via snapshot() or a per-consumer subscribe() handle.
+    """
+    def __init__(self, width=640, height=480, fps=30, config=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.config = config
+        self.error = None
+        self.reads = 0
+        self._cap = None
+        self._latest = None          # (seq, ts, frame)
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # ---- device
+    def _open_device(self):
+        config = self.config or probe()
+        if config is None:
+            return None
+        cap = cv2.VideoCapture(config["index"], config["backend"])
+        if not cap.isOpened() and self.config is None:
+            # cached device went away (unplugged / renumbered): probe again once
+            cap.release()
+            config = probe(force=True)
+            if config is None:
+                return None
+            cap = cv2.VideoCapture(config["index"], config["backend"])
+        if not cap.isOpened():
+            cap.release()
+            return None
+        # low latency: small frames, one-frame driver queue
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        cap.set(cv2.CAP_PROP_FPS, self.fps)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.config = config
+        return cap
+
+    def open(self):
+        """Open the device and start the reader thread if needed; True when frames are flowing."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return True
+            if self._cap is not None:
+                # the reader died on a failed read: free the device before opening it again
+                self._cap.release()
+                self._cap = None
+            self._cap = self._open_device()
+            if self._cap is None:
+                self.error = "Cannot open camera. Close other apps using the camera and try again."
+                return False
+            self.error = None
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._read_loop, daemon=True)
+            self._thread.start()
+            return True
+
+    def is_open(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def close(self):
+        with self._lock:
+            self._stop_event.set()
+            if self._thread is not None:
+                self._thread.join(timeout=2)
+                self._thread = None
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+
+    def _read_loop(self):
+        seq = 0
+        while not self._stop_event.is_set():
+            ret, frame = self._cap.read()
+            if not ret or frame is None:
+                self.error = "Frame read failed (camera returned no frame)."
+                break
+            seq += 1
+            self.reads += 1
+            with self._cond:
+                self._latest = (seq, time.time(), frame)
+                self._cond.notify_all()
+        with self._cond:
+            self._cond.notify_all()
+
+    # ---- consumers
+    def latest(self, after_seq=0, timeout=1.0):
+        """Newest (seq, ts, frame) with seq > after_seq, waiting up to timeout; None if none arrived."""
+        if not self.is_open() and not self.open():
+            return None
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._latest is None or self._latest[0] <= after_seq) and self.is_open():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            latest = self._latest
+        return latest if latest is not None and latest[0] > after_seq else None
+
+    def snapshot(self, timeout=2.0):
+        """Newest BGR frame (opening the camera on first use), or None."""
+        latest = self.latest(timeout=timeout)
+        return None if latest is None else latest[2]
+
+    def subscribe(self):
+        return CameraConsumer(self)
+
+
+class CameraConsumer:
+    """cv2.VideoCapture-like view of a SharedCamera: read() returns each new frame once; release() only detaches."""
+    def __init__(self, camera):
+        self.camera = camera
+        self._seq = 0
+        self._released = False
+
+    def isOpened(self):
+        return not self._released and (self.camera.is_open() or self.camera.open())
+
+    def read(self):
+        if self._released:
+            return False, None
+        latest = self.camera.latest(after_seq=self._seq)
+        if latest is None:
+            return False, None
+        self._seq = latest[0]
+        return True, latest[2]
+
+    def set(self, prop, value):
+        return False    # the shared device is configured once by SharedCamera
+
+    def get(self, prop):
+        return self.camera._cap.get(prop) if self.camera._cap is not None else 0.0
+
+    def release(self):
+        self._released = True
+
+
+_camera = None
+_camera_lock = threading.Lock()
+
+
+def get_camera(**kwargs):
+    """Process-wide SharedCamera (kwargs only apply on first call). Wrap in st.cache_resource in Streamlit apps."""
+    global _camera
+    if _camera is None:
+        with _camera_lock:
+            if _camera is None:
+                _camera = SharedCamera(**kwargs)
+    return _camera
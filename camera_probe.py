@@ -1,30 +1,27 @@
-﻿import cv2
-import time
+﻿# camera_probe.py — list which (backend, index) pairs open, and cache the first working one
+import argparse
 
-backends = [
-    cv2.CAP_DSHOW,  # DirectShow (Windows)
-    cv2.CAP_MSMF,   # Media Foundation (Windows)
-    cv2.CAP_V4L2,   # Linux (harmless on Windows)
-    cv2.CAP_ANY
-]
+import camera_manager
 
-def try_open(index, backend):
-    cap = cv2.VideoCapture(index, backend)
-    ok = cap.isOpened()
-    info = None
-    if ok:
-        ret, frame = cap.read()
-        if ret and frame is not None:
-            info = f"read OK shape={frame.shape}"
-        else:
-            info = "opened but read failed"
-        cap.release()
-    return ok, info
+parser = argparse.ArgumentParser(description="Probe webcams and refresh the cached camera config.")
+parser.add_argument("--all", action="store_true", help="try every backend/index instead of stopping at the first that works")
+args = parser.parse_args()
 
-for backend in backends:
-    print('=== backend:', backend, '===')
-    for i in range(0, 6):  # check indices 0..5
-        ok, info = try_open(i, backend)
-        print(f'index {i}: opened={ok} ; {info}')
-    print()
+if args.all:
+    backends = camera_manager.default_backends()
+    for name, backend in backends:
+        print('=== backend:', name, '===')
+        for i in range(0, 6):  # check indices 0..5
+            cap, info = camera_manager.try_open(i, backend)
+            if cap is not None:
+                cap.release()
+            print(f'index {i}: opened={cap is not None} ; {info}')
+        print()
+
+config = camera_manager.probe(force=True, verbose=not args.all)
+if config:
+    print(f"Using camera {config['index']} via {config['backend_name']} "
+          f"({config['width']}x{config['height']} @ {config['fps']} fps), cached in {camera_manager.cache_path()}")
+else:
+    print("No working camera found.")
 print('Done.')
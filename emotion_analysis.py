@@ -1,82 +1,533 @@
 # emotion_analysis.py — returns (emotion, confidence)
 import cv2
+import numpy as np
+import time
 import traceback
 from collections import deque
-import statistics
 
-# ✅ Import DeepFace safely
-try:
-    from deepface import DeepFace
-    DEEPFACE_AVAILABLE = True
-except Exception as e:
-    DEEPFACE_AVAILABLE = False
-    print("DeepFace import failed:", e)
+# ✅ DeepFace (and TensorFlow) is imported lazily by the shared registry on the first analysis
+from model_registry import get_registry, deepface_module, FACE_SIZE
+from face_tracking import haar_detector, haar_detector_all
+from frames import Frame, thread_buffers
+from perf_metrics import METRICS
 
-def analyze_emotion(frame):
+# Optional dispatcher (e.g. inference_pool.InferencePool) that analyze_emotion hands frames to
+_dispatcher = None
+# Optional frame_cache.FrameCache consulted before any analysis
+_cache = None
+
+
+def set_dispatcher(dispatcher):
+    """
+    Route analyze_emotion through dispatcher.analyze(frame, session=...); None = run in-process.
+    Batches use dispatcher.submit(frame, session=...) -> future and dispatcher.result(future) so
+    all their frames are in flight at once (inference_pool.InferencePool, inference_server.InferenceClient).
+    """
+    global _dispatcher
+    _dispatcher = dispatcher
+
+
+def set_cache(cache):
+    """Answer near-identical frames from cache (a frame_cache.FrameCache) without running the model; None = off."""
+    global _cache
+    _cache = cache
+
+
+def _cached(key, timings):
+    """Copy of the cached result for key (timings = the lookup itself), or None on a miss."""
+    with METRICS.span("cache_lookup", timings):
+        result = _cache.lookup(key)
+    if result is None:
+        return None
+    return EmotionResult(result.label, result.confidence, result.probs, result.box, timings, result.model, result.face_id)
+
+
+def _cache_store(key, result):
+    if key is not None and result.label not in IGNORED_LABELS:
+        _cache.store(key, result)
+
+
+def analyze_emotion(frame, tracker=None, session="default"):
     """
-    Input: RGB numpy array (H,W,3)
+    Input: RGB numpy array (H,W,3), or a frames.Frame in any color order (no conversion copy needed)
     Returns: (emotion_string, confidence_float)
-    Uses DeepFace with a safe, compatible call (no model_name param).
+    Uses DeepFace with a safe, compatible call (no model_name param); with an ONNX backend
+    (EMOTION_BACKEND / set_backend) the face is found with the Haar detector and classified by onnxruntime.
+    With a FaceTracker, detection is skipped on most frames and only the tracked face ROI is classified.
+    Without a tracker, frames go to the configured dispatcher (see set_dispatcher) if there is one.
+    With a frame cache (see set_cache), near-identical frames of the same session return the cached result.
     """
+    return analyze_emotion_result(frame, tracker, session).as_tuple()
+
+
+def analyze_emotion_result(frame, tracker=None, session="default"):
+    """Same as analyze_emotion, but returns the full EmotionResult (probabilities, box, timings, model)."""
+    key = None
+    if _cache is not None:
+        timings = {}
+        with METRICS.span("cache_hash", timings):
+            key = _cache.key(frame, session)
+        hit = _cached(key, timings)
+        if hit is not None:
+            return hit
+    if _dispatcher is not None and tracker is None:
+        result = _dispatch(frame, session)
+    else:
+        result = _analyze_local(frame, tracker)
+    if key is not None:
+        _cache_store(key, result)
+    return result
+
+
+def _dispatch(frame, session):
+    try:
+        return EmotionResult.coerce(_dispatcher.analyze(frame, session=session))
+    except Exception as e:
+        print("Dispatch analyze error:", e)
+        return EmotionResult("Error")
+
+
+def _analyze_local(frame, tracker=None):
+    """analyze_emotion_result() in this process/thread (what pool workers run)."""
+    timings = {}
     try:
-        if not DEEPFACE_AVAILABLE:
-            return "DeepFace Not Available", 0.0
+        registry = get_registry()
+        if not registry.available():
+            return EmotionResult("DeepFace Not Available")
+        model = registry.model_id
+
+        if tracker is not None or registry.backend != "keras":
+            batch = thread_buffers().get("batch1", (1, FACE_SIZE, FACE_SIZE, 1), np.float32)
+            box = _face_crop(frame, batch[0, :, :, 0], tracker, timings)
+            return EmotionResult.from_probs(_predict(batch, timings)[0], box, timings, model)
 
-        # ↓ Downscale for faster analysis
-        small = cv2.resize(frame, (320, 240))
+        # ↓ Downscale for faster analysis (into a reused buffer)
+        frame = Frame.wrap(frame)
+        with METRICS.span("resize", timings):
+            small = frame.resized((320, 240))
+        # DeepFace always gets RGB (the analyze_emotion input convention), whatever order the caller had
+        with METRICS.span("color", timings):
+            small = small.rgb()
 
         # Safe DeepFace call (avoid model_name if not supported)
         # Use detector_backend to speed up and be compatible across versions
-        result = DeepFace.analyze(
-            small,
-            actions=["emotion"],
-            enforce_detection=False,
-            detector_backend="opencv"
-        )
+        with METRICS.span("deepface_analyze", timings):
+            result = deepface_module().analyze(
+                small,
+                actions=["emotion"],
+                enforce_detection=False,
+                detector_backend="opencv"
+            )
 
         if isinstance(result, list):
             result = result[0]
 
-        # result may contain 'dominant_emotion' and 'emotion' dict
-        dominant = None
-        if isinstance(result, dict):
-            dominant = result.get("dominant_emotion") or (result.get("emotion") and max(result.get("emotion"), key=result.get("emotion").get))
-            probs = result.get("emotion") or {}
-        else:
-            # fallback: try common keys
-            dominant = None
-            probs = {}
+        # result has 'emotion' (percent per class), 'dominant_emotion' and 'region' (in the 320x240 image)
+        scores = result.get("emotion") if isinstance(result, dict) else None
+        if not scores:
+            return EmotionResult("Unknown", timings=timings, model=model)
+        probs = np.fromiter((scores.get(e) or 0.0 for e in EMOTIONS), dtype=np.float32, count=len(EMOTIONS)) / 100.0
+        dominant = result.get("dominant_emotion") or EMOTIONS[int(np.argmax(probs))]
+        region = result.get("region") or {}
+        box = None
+        if all(k in region for k in "xywh"):
+            box = _scale_box((region["x"], region["y"], region["w"], region["h"]), frame.shape)
+        conf = float(scores.get(dominant) or 0.0)
+        return EmotionResult(str(dominant).capitalize(), round(conf, 3), probs, box, timings, model + "+opencv")
+
+    except Exception as e:
+        METRICS.inc("analyze_errors")
+        print("DeepFace analyze error:", e)
+        traceback.print_exc()
+        return EmotionResult("Error", timings=timings)
 
-        conf = 0.0
-        if dominant and isinstance(probs, dict):
-            conf = float(probs.get(dominant, 0.0)) if probs.get(dominant) is not None else 0.0
+# ✅ Batched inference
+# DeepFace's emotion model output order (7 classes, 48x48 grayscale input)
+EMOTIONS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
 
-        if dominant:
-            return str(dominant).capitalize(), round(conf, 3)
-        else:
-            return "Unknown", 0.0
 
+class EmotionResult:
+    """
+    One analysis: label + confidence (%) as in analyze_emotion, the 7-way probabilities in EMOTIONS
+    order (float32, or None when unavailable), face box (x, y, w, h) in input-frame pixels,
+    per-stage timings in seconds and the id of the model that produced it. face_id is set in
+    multi-face mode (analyze_faces): the tracked face the result belongs to.
+    Unpacks like the old tuple: emo, conf = result.
+    """
+    __slots__ = ("label", "confidence", "probs", "box", "timings", "model", "face_id")
+
+    def __init__(self, label, confidence=0.0, probs=None, box=None, timings=None, model=None, face_id=None):
+        self.label = label
+        self.confidence = confidence
+        self.probs = probs
+        self.box = box
+        self.timings = timings or {}
+        self.model = model
+        self.face_id = face_id
+
+    @classmethod
+    def from_probs(cls, probs, box=None, timings=None, model=None, face_id=None):
+        label, conf = _label(probs)
+        return cls(label, conf, probs, box, timings, model, face_id)
+
+    @classmethod
+    def coerce(cls, result):
+        """EmotionResult as-is, or a legacy (emotion, confidence) tuple wrapped without probabilities."""
+        if isinstance(result, cls):
+            return result
+        emo, conf = result
+        return cls(emo, conf)
+
+    def as_tuple(self):
+        return self.label, self.confidence
+
+    def __iter__(self):
+        return iter((self.label, self.confidence))
+
+    def __repr__(self):
+        face = f", face_id={self.face_id}" if self.face_id is not None else ""
+        return f"EmotionResult({self.label!r}, {self.confidence}, box={self.box}, model={self.model!r}{face})"
+
+
+def _scale_box(box, shape, size=(320, 240)):
+    """Box found in the size=(w, h) analysis image -> pixels of the original frame."""
+    sx, sy = shape[1] / size[0], shape[0] / size[1]
+    x, y, w, h = box
+    return int(x * sx), int(y * sy), int(w * sx), int(h * sy)
+
+
+def _face_crop(frame, out, tracker=None, timings=None):
+    """
+    Find the face in a frame (detected, or followed by tracker) and write it as a 48x48
+    float gray crop into `out`. Resize, gray and crop all go through reused buffers/views.
+    Returns the face box in frame pixels, or None when no face was found.
+    """
+    buffers = thread_buffers()
+    frame = Frame.wrap(frame)
+    with METRICS.span("resize", timings):
+        small = frame.resized((320, 240), buffers)
+    with METRICS.span("color", timings):
+        gray = small.gray(buffers)
+    with METRICS.span("track" if tracker is not None else "detect", timings):
+        box = tracker.update(gray) if tracker is not None else haar_detector(gray)
+    if box is not None:
+        # same as enforce_detection=False: fall back to the whole frame when no face
+        x, y, w, h = box
+        gray = gray[y:y + h, x:x + w]
+    else:
+        METRICS.inc("no_face")
+    crop = buffers.resize(gray, (FACE_SIZE, FACE_SIZE), name="face", interpolation=cv2.INTER_AREA)
+    np.multiply(crop, 1.0 / 255.0, out=out, casting="unsafe")
+    return _scale_box(box, frame.shape) if box is not None else None
+
+
+def _predict(batch, timings=None):
+    """Run the emotion model once on a (N, 48, 48, 1) batch, returns (N, 7) probabilities."""
+    with METRICS.span("classify", timings):
+        probs = np.asarray(get_registry().emotion_model()(batch, training=False), dtype=np.float32)
+    METRICS.inc("faces_classified", len(batch))
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def _label(probs):
+    """Probability vector -> (emotion_string, confidence_float) like analyze_emotion."""
+    idx = int(np.argmax(probs))
+    return EMOTIONS[idx].capitalize(), round(float(probs[idx]) * 100.0, 3)
+
+
+def analyze_emotions_batch(frames, tracker=None):
+    """
+    Input: list of RGB numpy arrays (H,W,3) or frames.Frame objects
+    Returns: list of (emotion_string, confidence_float), one per frame.
+    Faces are detected per frame (or tracked, for consecutive frames), then all crops
+    go through the emotion model in one forward pass.
+    """
+    return [r.as_tuple() for r in analyze_emotions_batch_result(frames, tracker)]
+
+
+def analyze_emotions_batch_result(frames, tracker=None, session="default"):
+    """
+    analyze_emotions_batch returning EmotionResults (classify timing is for the whole batch).
+    With a frame cache (set_cache), cached frames are answered directly and only the rest is batched.
+    With a dispatcher (set_dispatcher) and no tracker, frames go to it one by one instead (the pool /
+    inference server batches across sessions itself).
+    """
+    frames = list(frames)
+    if not frames:
+        return []
+    if _cache is not None:
+        keys = [_cache.key(frame, session) for frame in frames]
+        results = [_cached(key, {}) for key in keys]
+        todo = [i for i, r in enumerate(results) if r is None]
+        if todo:
+            for i, result in zip(todo, _analyze_many([frames[i] for i in todo], tracker, session)):
+                results[i] = result
+                _cache_store(keys[i], result)
+        return results
+    return _analyze_many(frames, tracker, session)
+
+
+def _analyze_many(frames, tracker, session):
+    if _dispatcher is not None and tracker is None:
+        return _dispatch_many(frames, session)
+    return _analyze_batch(frames, tracker)
+
+
+def _dispatch_many(frames, session):
+    """Submit every frame before waiting for any, so the pool / server can work on them together."""
+    # the pool drops queued frames beyond max_pending per session: give each group of
+    # max_pending frames its own fairness key instead
+    lane = getattr(_dispatcher, "max_pending", None) or len(frames)
+    futures = []
+    for i, frame in enumerate(frames):
+        key = session if lane >= len(frames) else f"{session}#{i // lane}"
+        try:
+            futures.append(_dispatcher.submit(frame, session=key))
+        except Exception as e:
+            print("Dispatch submit error:", e)
+            futures.append(None)
+    results = []
+    for future in futures:
+        try:
+            results.append(EmotionResult("Error") if future is None else EmotionResult.coerce(_dispatcher.result(future)))
+        except Exception as e:
+            print("Dispatch analyze error:", e)
+            results.append(EmotionResult("Error"))
+    return results
+
+
+def _analyze_batch(frames, tracker=None):
+    if not get_registry().available():
+        return [EmotionResult("DeepFace Not Available") for _ in frames]
+    try:
+        model = get_registry().model_id
+        batch = thread_buffers().get("batch", (len(frames), FACE_SIZE, FACE_SIZE, 1), np.float32)
+        timings = [{} for _ in frames]
+        boxes = [_face_crop(frame, batch[i, :, :, 0], tracker, timings[i]) for i, frame in enumerate(frames)]
+        shared = {}
+        probs = _predict(batch, shared)
+        return [EmotionResult.from_probs(p, box, dict(t, **shared), model)
+                for p, box, t in zip(probs, boxes, timings)]
     except Exception as e:
-        print("DeepFace analyze error:", e)
+        METRICS.inc("analyze_errors")
+        print("Batch analyze error:", e)
+        traceback.print_exc()
+        return [EmotionResult("Error") for _ in frames]
+
+
+# ✅ Multi-face mode (panel interviews, group recordings)
+def analyze_faces(frame, tracker=None, max_faces=8):
+    """Every face in one frame -> [EmotionResult, ...] with face_id set (see analyze_faces_batch)."""
+    return analyze_faces_batch([frame], tracker, max_faces)[0]
+
+
+def analyze_faces_batch(frames, tracker=None, max_faces=8):
+    """
+    Multi-face mode: all faces of all frames are detected (or tracked) on the 320x240 gray image,
+    then every crop goes through the emotion model in one forward pass.
+    Returns one list of EmotionResults per frame (empty when no face). With a
+    face_tracking.MultiFaceTracker, face_id follows each face across frames; without one it is
+    the detection order in that frame (largest face first). When analysis fails every frame gets
+    one "Error" / "DeepFace Not Available" result with face_id None (FaceSmoothers skips those).
+    """
+    frames = list(frames)
+    if not frames:
+        return []
+    registry = get_registry()
+    if not registry.available():
+        return [[EmotionResult("DeepFace Not Available")] for _ in frames]
+    try:
+        model = registry.model_id
+        buffers = thread_buffers()
+        batch = buffers.get("faces", (len(frames) * max_faces, FACE_SIZE, FACE_SIZE, 1), np.float32)
+        timings = [{} for _ in frames]
+        faces = []    # (frame index, face id, box in frame pixels), in batch order
+        for i, frame in enumerate(frames):
+            frame = Frame.wrap(frame)
+            with METRICS.span("resize", timings[i]):
+                small = frame.resized((320, 240), buffers)
+            with METRICS.span("color", timings[i]):
+                gray = small.gray(buffers)
+            with METRICS.span("track" if tracker is not None else "detect", timings[i]):
+                found = tracker.update(gray) if tracker is not None else list(enumerate(haar_detector_all(gray, max_faces)))
+            if not found:
+                METRICS.inc("no_face")
+            for face_id, (x, y, w, h) in found[:max_faces]:
+                crop = buffers.resize(gray[y:y + h, x:x + w], (FACE_SIZE, FACE_SIZE), name="face", interpolation=cv2.INTER_AREA)
+                np.multiply(crop, 1.0 / 255.0, out=batch[len(faces), :, :, 0], casting="unsafe")
+                faces.append((i, face_id, _scale_box((x, y, w, h), frame.shape)))
+        results = [[] for _ in frames]
+        if faces:
+            shared = {}
+            probs = _predict(batch[:len(faces)], shared)
+            for p, (i, face_id, box) in zip(probs, faces):
+                results[i].append(EmotionResult.from_probs(p, box, dict(timings[i], **shared), model, face_id))
+        return results
+    except Exception as e:
+        METRICS.inc("analyze_errors")
+        print("Multi-face analyze error:", e)
         traceback.print_exc()
-        return "Error", 0.0
+        return [[EmotionResult("Error")] for _ in frames]
+
+
+class FrameQueue:
+    """
+    Queue frames and analyze them together once batch_size frames are waiting.
+    with_probs=True appends the 7-way probability vector to every result tuple.
+    session keys the frame cache (see set_cache).
+    """
+    def __init__(self, batch_size=8, tracker=None, with_probs=False, session="default"):
+        self.batch_size = max(1, int(batch_size))
+        self.tracker = tracker
+        self.with_probs = with_probs
+        self.session = session
+        self.frames = []
+        self.tags = []
+
+    def __len__(self):
+        return len(self.frames)
+
+    def push(self, frame, tag=None):
+        """Add a frame; returns [(tag, emotion, confidence), ...] when a batch ran, else []."""
+        self.frames.append(frame)
+        self.tags.append(tag)
+        if len(self.frames) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """Analyze whatever is queued (possibly a partial batch)."""
+        frames, tags = self.frames, self.tags
+        self.frames, self.tags = [], []
+        results = analyze_emotions_batch_result(frames, self.tracker, self.session)
+        if self.with_probs:
+            return [(tag, r.label, r.confidence, r.probs) for tag, r in zip(tags, results)]
+        return [(tag, r.label, r.confidence) for tag, r in zip(tags, results)]
 
 # ✅ Emotion smoother
+IGNORED_LABELS = ("Error", "Unknown", "DeepFace Not Available", "Dropped")
+
+
 class EmotionSmoother:
-    def __init__(self, window_size=5):
+    """
+    Stable emotion over recent results; update and get_stable_emotion are O(1) in the window size.
+
+    mode="window": majority label of the last window_size results (running per-label counts and
+                   confidence sums, adjusted on push and eviction); confidence = mean of that label's.
+    mode="ema":    exponential moving average of the probability vectors (alpha defaults to
+                   2 / (window_size + 1)); confidence = smoothed probability of the label, in %.
+    mode="probs":  mean probability vector over the last window_size results; confidence as for "ema".
+
+    Without probs, update() uses a one-hot vector scaled by the confidence. hysteresis is the margin
+    (share of the window for "window", probability otherwise) a new label needs over the current one.
+    """
+    MODES = ("window", "ema", "probs")
+
+    def __init__(self, window_size=5, mode="window", alpha=None, hysteresis=0.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown smoothing mode: {mode}")
+        self.window_size = window_size
+        self.mode = mode
+        self.alpha = alpha if alpha is not None else 2.0 / (window_size + 1)
+        self.hysteresis = hysteresis
         self.history = deque(maxlen=window_size)
+        self.counts = {}
+        self.conf_sums = {}
+        self.scores = np.zeros(len(EMOTIONS))     # ema / probs: smoothed (or summed) probabilities
+        self.stable = None
 
-    def update(self, emotion, confidence):
-        """Add new (emotion, confidence) pair"""
-        if emotion not in ["Error", "Unknown", "DeepFace Not Available"]:
-            # store a tuple
-            self.history.append((emotion, confidence))
+    def update(self, emotion, confidence, probs=None):
+        """Add new (emotion, confidence) pair; probs: optional 7-way probabilities in EMOTIONS order"""
+        if emotion in IGNORED_LABELS:
+            return
+        if self.mode == "window":
+            self._push_window(emotion, float(confidence))
+            candidate = max(self.counts, key=self.counts.get)
+            margin = (self.counts[candidate] - self.counts.get(self.stable, 0)) / len(self.history)
+        else:
+            vec = self._vector(emotion, confidence, probs)
+            if self.mode == "ema":
+                self.scores += self.alpha * (vec - self.scores) if self.history else vec - self.scores
+                self.history.append(None)    # only used as "has data" for ema
+            else:
+                if len(self.history) == self.history.maxlen:
+                    self.scores -= self.history[0]
+                self.history.append(vec)
+                self.scores += vec
+            candidate = EMOTIONS[int(np.argmax(self.scores))].capitalize()
+            margin = (self._score(candidate) - self._score(self.stable)) / 100.0
+        if self.stable is None or (candidate != self.stable and margin > self.hysteresis) \
+                or (self.mode == "window" and self.counts.get(self.stable, 0) == 0):
+            self.stable = candidate
+
+    def _push_window(self, emotion, confidence):
+        if len(self.history) == self.history.maxlen:
+            old_emotion, old_conf = self.history[0]
+            self.counts[old_emotion] -= 1
+            if self.counts[old_emotion]:
+                self.conf_sums[old_emotion] -= old_conf
+            else:
+                del self.counts[old_emotion], self.conf_sums[old_emotion]
+        self.history.append((emotion, confidence))
+        self.counts[emotion] = self.counts.get(emotion, 0) + 1
+        self.conf_sums[emotion] = self.conf_sums.get(emotion, 0.0) + confidence
+
+    @staticmethod
+    def _vector(emotion, confidence, probs):
+        if probs is not None:
+            vec = np.asarray(probs, dtype=np.float64)
+            return vec / vec.sum() if vec.sum() > 0 else vec
+        vec = np.zeros(len(EMOTIONS))
+        name = str(emotion).lower()
+        if name in EMOTIONS:
+            vec[EMOTIONS.index(name)] = float(confidence) / 100.0
+        return vec
+
+    def _score(self, label):
+        """Smoothed probability of label in % (ema / probs modes)."""
+        name = str(label).lower()
+        if name not in EMOTIONS:
+            return 0.0
+        score = self.scores[EMOTIONS.index(name)]
+        return 100.0 * (score if self.mode == "ema" else score / max(1, len(self.history)))
 
     def get_stable_emotion(self):
-        """Return the most common emotion in recent frames as (emotion, avg_conf)"""
-        if not self.history:
+        """Return the stable emotion in recent frames as (emotion, avg_conf)"""
+        if not self.history or self.stable is None:
             return "No Data", 0.0
-        emotions = [e for e, _ in self.history]
-        most_common = max(set(emotions), key=emotions.count)
-        avg_conf = statistics.mean([c for e, c in self.history if e == most_common])
-        return most_common, round(avg_conf, 3)
\ No newline at end of file
+        if self.mode == "window":
+            return self.stable, round(self.conf_sums[self.stable] / self.counts[self.stable], 3)
+        return self.stable, round(self._score(self.stable), 3)
+
+
+class FaceSmoothers:
+    """
+    Multi-face mode: one EmotionSmoother per face id. Faces not seen for max_idle_s seconds are
+    dropped (their id is retired by the tracker by then). Smoother options are passed through.
+    Results without a face id (the frame-level "Error" / "DeepFace Not Available") are ignored.
+    """
+    def __init__(self, max_idle_s=10.0, **smoother_kwargs):
+        self.max_idle_s = max_idle_s
+        self.smoother_kwargs = smoother_kwargs
+        self.smoothers = {}
+        self.last_seen = {}
+
+    @property
+    def mode(self):
+        return self.smoother_kwargs.get("mode", "window")
+
+    def update(self, face_id, emotion, confidence, probs=None, ts=None):
+        if face_id is None:
+            return
+        ts = time.time() if ts is None else ts
+        smoother = self.smoothers.get(face_id)
+        if smoother is None:
+            smoother = self.smoothers[face_id] = EmotionSmoother(**self.smoother_kwargs)
+        smoother.update(emotion, confidence, probs=probs)
+        self.last_seen[face_id] = ts
+        for stale in [f for f, seen in self.last_seen.items() if ts - seen > self.max_idle_s]:
+            del self.smoothers[stale], self.last_seen[stale]
+
+    def get_stable_emotions(self):
+        """{face_id: (emotion, avg_conf)} for every face currently followed, ordered by id."""
+        return {face_id: self.smoothers[face_id].get_stable_emotion() for face_id in sorted(self.smoothers)}
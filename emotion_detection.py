@@ -1,23 +1,43 @@
 import cv2
-import mediapipe as mp
 
-mp_face = mp.solutions.face_detection
-mp_draw = mp.solutions.drawing_utils
+from face_tracking import FaceTracker
 
-def run_camera(show_window=True):
-    cap = cv2.VideoCapture(0)
+
+def mediapipe_detector(detector):
+    """Wrap a mediapipe FaceDetection as a FaceTracker detector: RGB frame -> (x, y, w, h) or None."""
+    def detect(rgb):
+        results = detector.process(rgb)
+        if not results.detections:
+            return None
+        h, w = rgb.shape[:2]
+        best = max(results.detections, key=lambda d: d.score[0])
+        bb = best.location_data.relative_bounding_box
+        x, y = max(0, int(bb.xmin * w)), max(0, int(bb.ymin * h))
+        bw, bh = min(w - x, int(bb.width * w)), min(h - y, int(bb.height * h))
+        if bw <= 0 or bh <= 0:
+            return None
+        return x, y, bw, bh
+    return detect
+
+
+def run_camera(show_window=True, redetect_every=10, source=0):
+    """source: webcam index, or a video file path (a recorded answer)."""
+    cap = cv2.VideoCapture(source)
     if not cap.isOpened():
-        raise RuntimeError("Could not open webcam.")
-    with mp_face.FaceDetection(model_selection=0, min_detection_confidence=0.5) as detector:
+        raise RuntimeError(f"Could not open {'webcam' if isinstance(source, int) else source}.")
+    import mediapipe as mp   # heavy; only needed once the webcam window is opened
+    with mp.solutions.face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.5) as detector:
+        # mediapipe runs only on re-detect frames; the box is tracked in between
+        tracker = FaceTracker(detector=mediapipe_detector(detector), redetect_every=redetect_every)
         while True:
             ret, frame = cap.read()
             if not ret:
                 break
             rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = detector.process(rgb)
-            if results.detections:
-                for det in results.detections:
-                    mp_draw.draw_detection(frame, det)
+            box = tracker.update(rgb)
+            if box is not None:
+                x, y, w, h = box
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
             if show_window:
                 cv2.imshow("Webcam (press q to quit)", frame)
                 if cv2.waitKey(1) & 0xFF == ord("q"):
@@ -26,4 +46,5 @@ def run_camera(show_window=True):
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    run_camera()
+    import sys
+    run_camera(source=sys.argv[1] if len(sys.argv) > 1 else 0)
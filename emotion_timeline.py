@@ -0,0 +1,188 @@
+# emotion_timeline.py — append-only, array-backed emotion history with range queries and downsampling
+#
+# Parallel columns (ts float64, label code uint8, confidence float32, probs float32[N, 7]) grow by
+# doubling, so append is amortized O(1). With path= the columns live in memory-mapped files
+# (<path>/ts.f64, code.u8, confidence.f32, probs.f32 + meta.json) and survive the process.
+import json
+import os
+
+import numpy as np
+
+from session_store import LABELS, label_code
+
+N_PROBS = len(LABELS) - 1   # probability vector over the 7 model emotions ("Other" has none)
+_COLUMNS = (("ts", np.float64, ()), ("code", np.uint8, ()), ("confidence", np.float32, ()),
+            ("probs", np.float32, (N_PROBS,)))
+_EXT = {"ts": "f64", "code": "u8", "confidence": "f32", "probs": "f32"}
+
+
+class EmotionTimeline:
+    """Session emotion history; timestamps are expected to be (roughly) non-decreasing."""
+    def __init__(self, capacity=1024, path=None, flush_every=256):
+        self.path = path
+        self.flush_every = flush_every
+        self.n = 0
+        self._cols = {}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            meta_path = os.path.join(path, "meta.json")
+            if os.path.exists(meta_path):
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                self.n = meta["count"]
+                capacity = max(capacity, meta["capacity"])
+        self._alloc(max(capacity, 1))
+
+    @classmethod
+    def open(cls, path):
+        """Reopen a persisted timeline (appends continue where it stopped)."""
+        return cls(path=path)
+
+    # ---- storage
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.{_EXT[name]}")
+
+    def _alloc(self, capacity):
+        old = self._cols
+        self._cols = {}
+        for name, dtype, tail in _COLUMNS:
+            shape = (capacity,) + tail
+            if self.path is None:
+                col = np.zeros(shape, dtype=dtype)
+                if name in old:
+                    col[:self.n] = old[name][:self.n]
+            else:
+                if name in old:
+                    old[name].flush()
+                nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                with open(self._file(name), "a+b") as f:
+                    if os.path.getsize(self._file(name)) < nbytes:
+                        f.truncate(nbytes)
+                col = np.memmap(self._file(name), dtype=dtype, mode="r+", shape=shape)
+            self._cols[name] = col
+        self.capacity = capacity
+        if self.path is not None:
+            self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": self.n, "capacity": self.capacity, "labels": list(LABELS)}, f)
+
+    def flush(self):
+        if self.path is not None:
+            for col in self._cols.values():
+                col.flush()
+            self._write_meta()
+
+    def close(self):
+        self.flush()
+
+    # ---- writes
+    def append(self, ts, emotion, confidence, probs=None):
+        """Add one result. probs: 7 model probabilities (EMOTIONS order); default is one-hot from the label."""
+        if self.n == self.capacity:
+            self._alloc(self.capacity * 2)
+        i = self.n
+        code = label_code(emotion)
+        self._cols["ts"][i] = ts
+        self._cols["code"][i] = code
+        self._cols["confidence"][i] = confidence
+        row = self._cols["probs"][i]
+        if probs is not None:
+            row[:] = probs
+        else:
+            row[:] = 0.0
+            if code < N_PROBS:
+                row[code] = float(confidence) / 100.0
+        self.n += 1
+        if self.path is not None and self.n % self.flush_every == 0:
+            self.flush()
+
+    def extend(self, other):
+        """Append every row of another timeline (e.g. move an in-memory history to disk)."""
+        need = self.n + len(other)
+        if need > self.capacity:
+            self._alloc(max(need, self.capacity * 2))
+        for name, col in self._cols.items():
+            col[self.n:need] = other.column(name)
+        self.n = need
+        self.flush()
+
+    # ---- reads (views, no copies)
+    def __len__(self):
+        return self.n
+
+    def column(self, name):
+        return self._cols[name][:self.n]
+
+    @property
+    def ts(self):
+        return self.column("ts")
+
+    @property
+    def codes(self):
+        return self.column("code")
+
+    @property
+    def confidence(self):
+        return self.column("confidence")
+
+    @property
+    def probs(self):
+        return self.column("probs")
+
+    def range(self, t0=None, t1=None):
+        """Index slice of rows with t0 <= ts < t1 (binary search)."""
+        ts = self.ts
+        lo = 0 if t0 is None else int(np.searchsorted(ts, t0, side="left"))
+        hi = self.n if t1 is None else int(np.searchsorted(ts, t1, side="left"))
+        return slice(lo, hi)
+
+    def last(self, k):
+        """The newest k rows as [(ts, emotion, confidence), ...], oldest first (like the old history deque)."""
+        lo = max(0, self.n - k)
+        return [(float(t), LABELS[c], float(p)) for t, c, p in
+                zip(self._cols["ts"][lo:self.n], self._cols["code"][lo:self.n], self._cols["confidence"][lo:self.n])]
+
+    # ---- aggregates
+    def downsample(self, max_points=300, t0=None, t1=None):
+        """
+        At most max_points rows for charting: equal-count buckets averaged with reduceat.
+        Returns (ts, confidence, probs) arrays; the chart size no longer grows with the session.
+        """
+        sl = self.range(t0, t1)
+        ts, conf, probs = self.ts[sl], self.confidence[sl], self.probs[sl]
+        n = len(ts)
+        if n <= max_points:
+            return np.array(ts), np.array(conf), np.array(probs)
+        starts = (np.arange(max_points) * n) // max_points
+        sizes = np.diff(np.append(starts, n))
+        return (np.add.reduceat(ts, starts) / sizes,
+                np.add.reduceat(conf.astype(np.float64), starts) / sizes,
+                np.add.reduceat(probs.astype(np.float64), starts, axis=0) / sizes[:, None])
+
+    def counts(self, t0=None, t1=None):
+        """{label: number of results} in [t0, t1)."""
+        codes = self.codes[self.range(t0, t1)]
+        return {LABELS[i]: int(c) for i, c in enumerate(np.bincount(codes, minlength=len(LABELS))) if c}
+
+    def share_per_window(self, window=60.0, t0=None, t1=None):
+        """
+        Emotion share per time window (default: per minute).
+        Returns (window_start_ts, shares[windows, len(LABELS)]) where each row sums to 1 (or 0 if empty).
+        """
+        sl = self.range(t0, t1)
+        ts, codes = self.ts[sl], self.codes[sl]
+        if not len(ts):
+            return np.empty(0), np.empty((0, len(LABELS)))
+        origin = ts[0] if t0 is None else t0
+        bucket = ((ts - origin) // window).astype(np.int64)
+        n_buckets = int(bucket[-1]) + 1
+        counts = np.bincount(bucket * len(LABELS) + codes, minlength=n_buckets * len(LABELS))
+        counts = counts.reshape(n_buckets, len(LABELS)).astype(np.float64)
+        totals = counts.sum(axis=1, keepdims=True)
+        shares = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+        return origin + window * np.arange(n_buckets), shares
+
+    def share_per_minute(self, t0=None, t1=None):
+        return self.share_per_window(60.0, t0, t1)
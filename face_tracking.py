@@ -0,0 +1,181 @@
+# face_tracking.py — detect a face once, then follow it cheaply across frames
+import cv2
+
+from model_registry import get_registry
+
+
+def haar_detector(gray):
+    """Largest face (x, y, w, h) in a grayscale uint8 image using the shared Haar cascade, or None."""
+    faces = get_registry().face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=10)
+    if len(faces) == 0:
+        return None
+    x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+    return int(x), int(y), int(w), int(h)
+
+
+def haar_detector_all(gray, max_faces=8):
+    """Every face [(x, y, w, h), ...] in a grayscale uint8 image, largest first (at most max_faces)."""
+    faces = get_registry().face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=10)
+    faces = sorted((tuple(int(v) for v in f) for f in faces), key=lambda f: f[2] * f[3], reverse=True)
+    return faces[:max_faces]
+
+
+def iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _match_template(image, box, template, search_margin):
+    """Template-match a face patch inside a window around box -> (new box or None, score)."""
+    x, y, w, h = box
+    mx, my = int(w * search_margin), int(h * search_margin)
+    H, W = image.shape[:2]
+    x0, y0 = max(0, x - mx), max(0, y - my)
+    x1, y1 = min(W, x + w + mx), min(H, y + h + my)
+    window = image[y0:y1, x0:x1]
+    th, tw = template.shape[:2]
+    if window.shape[0] < th or window.shape[1] < tw:
+        return None, 0.0
+    res = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, loc = cv2.minMaxLoc(res)
+    return (x0 + loc[0], y0 + loc[1], tw, th), float(score)
+
+
+class FaceTracker:
+    """
+    Runs the (expensive) detector only every `redetect_every` frames or when tracking drifts.
+    In between, the face box is followed by template matching in a small window around
+    the last position. Works on whatever image type the detector accepts (gray or RGB).
+    """
+    def __init__(self, detector=None, redetect_every=15, min_score=0.6, search_margin=0.5):
+        self.detector = detector or haar_detector
+        self.redetect_every = redetect_every
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.box = None
+        self.template = None
+        self.frames_since_detect = 0
+        # counters (how often we had to fall back to detection)
+        self.detections = 0
+        self.tracked = 0
+
+    def reset(self):
+        self.box = None
+        self.template = None
+        self.frames_since_detect = 0
+
+    def update(self, image):
+        """Returns the face box (x, y, w, h) for this frame, or None when no face is found."""
+        if self.box is not None and self.frames_since_detect < self.redetect_every:
+            box, score = self._track(image)
+            if box is not None and score >= self.min_score:
+                self.box = box
+                self.frames_since_detect += 1
+                self.tracked += 1
+                return box
+        return self._detect(image)
+
+    def _detect(self, image):
+        self.detections += 1
+        self.frames_since_detect = 0
+        box = self.detector(image)
+        if box is None:
+            self.reset()
+            return None
+        x, y, w, h = box
+        self.box = box
+        self.template = image[y:y + h, x:x + w].copy()
+        return box
+
+    def _track(self, image):
+        """Template-match the last face patch inside a window around the previous box."""
+        return _match_template(image, self.box, self.template, self.search_margin)
+
+
+class _Track:
+    __slots__ = ("id", "box", "template", "missed")
+
+    def __init__(self, track_id, box, template):
+        self.id = track_id
+        self.box = box
+        self.template = template
+        self.missed = 0
+
+
+class MultiFaceTracker:
+    """
+    Keeps an id per face across frames (panel interviews, group recordings). All faces are detected
+    every `redetect_every` frames and matched to the existing tracks by IoU (greedy, best overlap
+    first); new faces get new ids. In between, every face is followed by template matching; if any
+    of them is lost, detection runs on that frame instead. A track that is not re-detected survives
+    `max_missed` detections (brief occlusion) before its id is retired.
+    """
+    def __init__(self, detector=None, redetect_every=10, iou_threshold=0.3, max_missed=3,
+                 min_score=0.6, search_margin=0.5, max_faces=8):
+        self.detector = detector or (lambda gray: haar_detector_all(gray, max_faces))
+        self.redetect_every = redetect_every
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.tracks = []
+        self.frames_since_detect = 0
+        self.next_id = 0
+        self.detections = 0
+        self.tracked = 0
+
+    def reset(self):
+        self.tracks = []
+        self.frames_since_detect = 0
+
+    def update(self, image):
+        """Returns [(face_id, (x, y, w, h)), ...] for the faces visible in this frame, ordered by id."""
+        visible = [t for t in self.tracks if t.missed == 0]
+        if visible and self.frames_since_detect < self.redetect_every:
+            moved = [_match_template(image, t.box, t.template, self.search_margin) for t in visible]
+            if all(box is not None and score >= self.min_score for box, score in moved):
+                for t, (box, _) in zip(visible, moved):
+                    t.box = box
+                self.frames_since_detect += 1
+                self.tracked += 1
+                return [(t.id, t.box) for t in visible]
+        return self._detect(image)
+
+    def _detect(self, image):
+        self.detections += 1
+        self.frames_since_detect = 0
+        boxes = list(self.detector(image))
+        pairs = sorted(((iou(t.box, b), ti, bi) for ti, t in enumerate(self.tracks) for bi, b in enumerate(boxes)),
+                       reverse=True)
+        matched_tracks, matched_boxes = set(), set()
+        for overlap, ti, bi in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if ti in matched_tracks or bi in matched_boxes:
+                continue
+            matched_tracks.add(ti)
+            matched_boxes.add(bi)
+            self._assign(self.tracks[ti], boxes[bi], image)
+        for ti, t in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                t.missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        for bi, box in enumerate(boxes):
+            if bi not in matched_boxes:
+                track = _Track(self.next_id, box, None)
+                self.next_id += 1
+                self._assign(track, box, image)
+                self.tracks.append(track)
+        self.tracks.sort(key=lambda t: t.id)
+        return [(t.id, t.box) for t in self.tracks if t.missed == 0]
+
+    @staticmethod
+    def _assign(track, box, image):
+        x, y, w, h = box
+        track.box = box
+        track.template = image[y:y + h, x:x + w].copy()
+        track.missed = 0
@@ -0,0 +1,62 @@
+# features.py — optional subsystems of the Streamlit apps and what each one needs
+#
+# TRAINER_FEATURES=emotion,speech (default: all) picks the subsystems an app starts with; a disabled
+# subsystem's modules are never imported, so first paint only pays for what is actually used.
+# The sidebar toggles in main.py / main_polished.py start from this setting.
+import importlib.util
+import os
+
+FEATURES = {
+    # name: (label, top-level packages it imports when used)
+    "emotion": ("Emotion detection", ("cv2", "deepface")),
+    "speech": ("Speech sentiment", ("speech_recognition", "textblob")),
+}
+
+
+def from_env():
+    """Feature names enabled by TRAINER_FEATURES (comma-separated; unset or "all" = every feature)."""
+    value = os.environ.get("TRAINER_FEATURES", "all").strip().lower()
+    if value in ("", "all"):
+        return list(FEATURES)
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FEATURES]
+    if unknown:
+        print("Unknown TRAINER_FEATURES entries ignored:", ", ".join(unknown))
+    return [name for name in names if name in FEATURES]
+
+
+def enabled(name):
+    return name in from_env()
+
+
+def label(name):
+    return FEATURES[name][0]
+
+
+def requirements(name):
+    packages = FEATURES[name][1]
+    if name == "emotion" and os.environ.get("EMOTION_BACKEND", "keras") != "keras":
+        # the onnx backends run without DeepFace / TensorFlow (see model_registry.py)
+        packages = tuple("onnxruntime" if pkg == "deepface" else pkg for pkg in packages)
+    return packages
+
+
+def missing(name):
+    """Packages the feature needs that are not installed (checked without importing them)."""
+    return [pkg for pkg in requirements(name) if importlib.util.find_spec(pkg) is None]
+
+
+def sidebar_toggles():
+    """One sidebar checkbox per feature (defaults from TRAINER_FEATURES); returns the enabled names."""
+    import streamlit as st
+
+    chosen = []
+    for name in FEATURES:
+        gaps = missing(name)
+        on = st.sidebar.checkbox(label(name), value=enabled(name) and not gaps, key=f"feature_{name}",
+                                 help="Off = its models and libraries are never imported in this session.")
+        if gaps:
+            st.sidebar.caption(f"{label(name)} needs: {', '.join(gaps)}")
+        if on:
+            chosen.append(name)
+    return chosen
@@ -1,10 +1,9 @@
-from textblob import TextBlob
+import sentiment
 
 def generate_feedback(transcript):
     if not transcript.strip():
         return "No speech detected - please try again."
-    blob = TextBlob(transcript)
-    polarity = blob.sentiment.polarity
+    polarity = sentiment.polarity(transcript)
     if polarity > 0.3:
         tone, advice = "Positive", "Keep the confident tone. Add more examples."
     elif polarity < -0.2:
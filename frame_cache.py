@@ -0,0 +1,112 @@
+# frame_cache.py — reuse emotion results for near-identical frames
+#
+# Frames are keyed by a difference hash (dHash) of the downscaled gray frame: hash_size x hash_size
+# bits, each "is this pixel brighter than its right neighbour". Frames whose hashes differ in at
+# most `threshold` bits count as the same picture (a seated candidate between two frames, or a
+# Streamlit rerun re-submitting the same camera_input image) and get the cached result back
+# without touching the model. Entries expire after ttl_s and the least recently used entry is
+# evicted once max_entries are stored. Entries are per session, so sessions never share results.
+#
+#   FRAME_CACHE=0 disables it in the apps; FRAME_CACHE_TTL / FRAME_CACHE_THRESHOLD tune it.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from frames import Frame, thread_buffers
+from perf_metrics import METRICS
+
+
+def dhash(frame, hash_size=16):
+    """Difference hash of a frame (Frame, or RGB ndarray) as an int of hash_size**2 bits."""
+    frame = Frame.wrap(frame)
+    buffers = thread_buffers()
+    small = buffers.resize(frame.data, (hash_size + 1, hash_size), name="hash", interpolation=cv2.INTER_AREA)
+    gray = small if small.ndim == 2 else Frame(small, frame.order).gray(buffers, name="hash_gray")
+    bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class FrameCache:
+    """Bounded LRU + TTL map from frame hash to EmotionResult, with near-duplicate lookup."""
+    def __init__(self, max_entries=256, ttl_s=3.0, threshold=6, hash_size=16):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self.hash_size = hash_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()    # (session, hash) -> (stored_at, result)
+        self._lock = threading.Lock()
+
+    def key(self, frame, session="default"):
+        return session, dhash(frame, self.hash_size)
+
+    def lookup(self, key):
+        """Cached result for a frame within `threshold` bits of key (same session), or None."""
+        session, h = key
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is None and self.threshold:
+                best, best_key = self.threshold + 1, None
+                for (s, other) in self._entries:
+                    if s == session:
+                        d = hamming(h, other)
+                        if d < best:
+                            best, best_key = d, (s, other)
+                if best_key is not None:
+                    key, entry = best_key, self._entries[best_key]
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        self._record(entry is not None)
+        return None if entry is None else entry[1]
+
+    def store(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        METRICS.set_gauge("frame_cache_entries", len(self._entries))
+
+    def _expire(self, now):
+        # entries are kept in use order, but a hit does not refresh stored_at, so scan them all
+        stale = [k for k, (stored_at, _) in self._entries.items() if now - stored_at > self.ttl_s]
+        for k in stale:
+            del self._entries[k]
+
+    def _record(self, hit):
+        METRICS.inc("frame_cache_hits" if hit else "frame_cache_misses")
+        METRICS.set_gauge("frame_cache_hit_rate", round(self.hit_rate(), 3))
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hit_rate(), 3), "ttl_s": self.ttl_s, "threshold": self.threshold}
+
+
+def cache_from_env():
+    """FrameCache unless FRAME_CACHE=0; FRAME_CACHE_TTL (s) and FRAME_CACHE_THRESHOLD (bits) tune it."""
+    if os.environ.get("FRAME_CACHE", "1").strip().lower() in ("0", "off", "false", "no"):
+        return None
+    return FrameCache(ttl_s=float(os.environ.get("FRAME_CACHE_TTL", "3.0")),
+                      threshold=int(os.environ.get("FRAME_CACHE_THRESHOLD", "6")))
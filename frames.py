@@ -0,0 +1,84 @@
+# frames.py — frames that know their color order + reusable per-thread work buffers
+import threading
+
+import cv2
+import numpy as np
+
+_TO_GRAY = {"BGR": cv2.COLOR_BGR2GRAY, "RGB": cv2.COLOR_RGB2GRAY}
+_TO_RGB = {"BGR": cv2.COLOR_BGR2RGB, "GRAY": cv2.COLOR_GRAY2RGB}
+
+
+class Frame:
+    """An image array plus its channel order ("BGR", "RGB" or "GRAY"). Wrapping never copies."""
+    __slots__ = ("data", "order")
+
+    def __init__(self, data, order="RGB"):
+        self.data = data
+        self.order = order
+
+    @classmethod
+    def wrap(cls, frame):
+        """Frame as-is, or a bare ndarray treated as RGB (the analyze_emotion convention)."""
+        return frame if isinstance(frame, Frame) else cls(frame, "RGB")
+
+    @classmethod
+    def from_av(cls, av_frame):
+        return cls(av_frame.to_ndarray(format="bgr24"), "BGR")
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def gray(self, buffers=None, name="gray"):
+        """Grayscale view: the data itself if already gray, else converted into a reused buffer."""
+        if self.order == "GRAY":
+            return self.data
+        buffers = buffers or thread_buffers()
+        return buffers.convert(self.data, _TO_GRAY[self.order], name=name)
+
+    def rgb(self, buffers=None, name="rgb"):
+        """RGB view: the data itself if already RGB, else converted into a reused buffer."""
+        if self.order == "RGB":
+            return self.data
+        buffers = buffers or thread_buffers()
+        return buffers.convert(self.data, _TO_RGB[self.order], channels=3, name=name)
+
+    def resized(self, size, buffers=None, name="resize"):
+        """Same-order Frame resized to (width, height) into a reused buffer."""
+        buffers = buffers or thread_buffers()
+        return Frame(buffers.resize(self.data, size, name=name), self.order)
+
+
+class FrameBuffers:
+    """Named, preallocated arrays that resize/convert write into instead of allocating per frame."""
+    def __init__(self):
+        self._bufs = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        buf = self._bufs.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._bufs[name] = np.empty(shape, dtype=dtype)
+        return buf
+
+    def resize(self, src, size, name="resize", interpolation=cv2.INTER_LINEAR):
+        w, h = size
+        dst = self.get(name, (h, w) + src.shape[2:], src.dtype)
+        cv2.resize(src, (w, h), dst=dst, interpolation=interpolation)
+        return dst
+
+    def convert(self, src, code, channels=1, name="convert"):
+        shape = src.shape[:2] + ((channels,) if channels > 1 else ())
+        dst = self.get(name, shape, src.dtype)
+        cv2.cvtColor(src, code, dst=dst)
+        return dst
+
+
+_local = threading.local()
+
+
+def thread_buffers():
+    """FrameBuffers owned by the calling thread (buffers are never shared between threads)."""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = FrameBuffers()
+    return buffers
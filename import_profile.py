@@ -0,0 +1,115 @@
+# import_profile.py — how long the Streamlit entry points spend importing before the first widget
+#
+#   python import_profile.py main_polished.py --features speech
+#   python import_profile.py main.py main_polished.py --budget-ms 1500      (CI: exit 1 over budget)
+#
+# Collects the imports an entry script runs at startup (top level, plus the `if <feature>_on:` blocks
+# of the enabled features), imports them in a fresh interpreter with `python -X importtime` and
+# reports the total and the most expensive modules as JSON. Modules that are not installed are
+# listed under "missing" instead of failing the run.
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+from features import FEATURES, from_env
+
+_CHILD = """
+import json, sys, time
+missing = []
+t0 = time.perf_counter()
+for name in json.loads(sys.argv[1]):
+    try:
+        __import__(name)   # not importlib.import_module: only __import__ shows up in -X importtime
+    except Exception as e:
+        missing.append([name, repr(e)])
+print(json.dumps({"total_ms": round(1000 * (time.perf_counter() - t0), 1), "missing": missing}))
+"""
+
+
+def _gate(node):
+    """Feature name of an `if <feature>_on:` block, else None."""
+    test = node.test
+    if isinstance(test, ast.Name) and test.id.endswith("_on") and test.id[:-3] in FEATURES:
+        return test.id[:-3]
+    return None
+
+
+def startup_imports(script, features):
+    """Module names imported by script before first paint with the given features enabled."""
+    with open(script, encoding="utf-8-sig") as f:
+        tree = ast.parse(f.read(), script)
+    names = []
+
+    def collect(body):
+        for node in body:
+            if isinstance(node, ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                names.append(node.module)
+            elif isinstance(node, ast.If) and _gate(node) in features:
+                collect(node.body)
+
+    collect(tree.body)
+    return list(dict.fromkeys(names))
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth), ...] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile(modules, top=15, python=None):
+    """Import modules in a fresh interpreter; total wall time plus per-module times in ms."""
+    proc = subprocess.run([python or sys.executable, "-X", "importtime", "-c", _CHILD, json.dumps(modules)],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "profiling failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    rows = parse_importtime(proc.stderr)
+    cumulative = {name: cum_us for name, _, cum_us, depth in rows if depth == 0}
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    return {
+        "modules": modules,
+        "total_ms": result["total_ms"],
+        # 0 = already imported by an earlier module in the list
+        "by_module_ms": {m: round(cumulative.get(m, 0) / 1000, 1) for m in modules},
+        "top_self_ms": [{"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cum_us / 1000, 1)}
+                        for name, self_us, cum_us, _ in heaviest],
+        "missing": dict(result["missing"]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time profile of the Streamlit entry points.")
+    parser.add_argument("scripts", nargs="*", default=["main_polished.py"])
+    parser.add_argument("--features", default=None,
+                        help="comma-separated features to enable (default: TRAINER_FEATURES, i.e. all)")
+    parser.add_argument("--top", type=int, default=15, help="number of most expensive modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="exit 1 if any script's imports take longer")
+    args = parser.parse_args(argv)
+
+    features = [f.strip() for f in args.features.split(",") if f.strip()] if args.features is not None else from_env()
+    reports = []
+    for script in args.scripts:
+        report = {"script": script, "features": features}
+        report.update(profile(startup_imports(script, features), top=args.top))
+        if args.budget_ms is not None:
+            report["budget_ms"] = args.budget_ms
+            report["ok"] = report["total_ms"] <= args.budget_ms
+        reports.append(report)
+    print(json.dumps(reports, indent=2))
+    return 0 if all(r.get("ok", True) for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# incremental_render.py — Streamlit widgets that send deltas instead of full repaints
+#
+# - Slot:          an st.empty() that is only repainted when its content changed
+# - encode_jpeg:   preview frames as downscaled JPEG bytes instead of full-size RGB arrays
+# - PreviewView:   live preview that skips repeated frames / captions
+# - HistoryView:   recent detections + confidence chart of an EmotionTimeline; new points are
+#                  appended with add_rows, and everything derived from the timeline is memoized in a
+#                  session-state dict so a rerun with no new results recomputes nothing
+# Nothing here imports streamlit: the views write into containers / placeholders they are given.
+import time
+
+import cv2
+import numpy as np
+
+from frames import Frame, thread_buffers
+from session_store import LABELS
+
+PREVIEW_WIDTH = 480
+PREVIEW_QUALITY = 70
+
+
+class Slot:
+    """
+    Wraps a placeholder; paint("info", text) is a no-op when the same call was the last one painted.
+    key= replaces the comparison of the arguments themselves (for images, charts, arrays).
+    """
+    def __init__(self, placeholder):
+        self.placeholder = placeholder
+        self.last_key = None
+        self.skipped = 0
+
+    def paint(self, kind, *args, key=None, **kwargs):
+        key = (kind, args, tuple(sorted(kwargs.items()))) if key is None else key
+        if key == self.last_key:
+            self.skipped += 1
+            return False
+        self.last_key = key
+        getattr(self.placeholder, kind)(*args, **kwargs)
+        return True
+
+    def clear(self):
+        self.last_key = None
+        self.placeholder.empty()
+
+
+def encode_jpeg(frame, width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY):
+    """JPEG bytes of frame (Frame or RGB ndarray) scaled down to at most width pixels wide."""
+    frame = Frame.wrap(frame)
+    buffers = thread_buffers()
+    h, w = frame.shape[:2]
+    if w > width:
+        frame = frame.resized((width, max(1, round(h * width / w))), buffers, name="preview")
+    data = frame.data
+    if frame.order == "RGB":
+        data = buffers.convert(data, cv2.COLOR_RGB2BGR, channels=3, name="preview_bgr")
+    ok, buf = cv2.imencode(".jpg", data, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+class PreviewView:
+    """Live preview: one downscaled JPEG per new frame; the same frame + caption is never re-encoded or resent."""
+    def __init__(self, placeholder, width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY):
+        self.slot = Slot(placeholder)
+        self.width = width
+        self.quality = quality
+        self.bytes_sent = 0
+
+    def show(self, seq, frame, caption=""):
+        key = ("image", seq, caption)
+        if key == self.slot.last_key:
+            self.slot.skipped += 1
+            return False
+        jpeg = encode_jpeg(frame, self.width, self.quality)
+        self.bytes_sent += len(jpeg)
+        return self.slot.paint("image", jpeg, caption=caption, key=key)
+
+
+class HistoryView:
+    """
+    Right-column history: a recent-detections list and a confidence chart (plus per-minute shares).
+    The chart is drawn once per run from timeline.downsample(max_points); later points are appended
+    with add_rows, and it is redrawn downsampled once the appended tail grows past max_points.
+    memo: a dict kept in st.session_state so a rerun reuses the rows and arrays computed before.
+    clock: ts -> display string (default: local wall-clock time; e.g. video position for files).
+    """
+    def __init__(self, container, timeline, memo, max_points=300, recent=6, share_every=5.0, clock=None):
+        self.timeline = timeline
+        self.clock = clock or (lambda ts: time.strftime("%H:%M:%S", time.localtime(ts)))
+        self.memo = memo
+        self.max_points = max_points
+        self.recent = recent
+        self.share_every = share_every
+        self._recent = Slot(container.empty())
+        self._chart_slot = container.empty()
+        self._share = Slot(container.empty())
+        self._chart = None
+        self._chart_n = 0          # timeline rows already represented in the chart
+        self._appended = 0         # points added with add_rows since the last full draw
+        self._share_at = 0.0
+
+    def _memoized(self, name, n, compute):
+        key = (id(self.timeline), n)
+        entry = self.memo.get(name)
+        if entry is None or entry[0] != key:
+            entry = self.memo[name] = (key, compute())
+        return entry[1]
+
+    def _recent_text(self):
+        rows = [f"- {self.clock(ts)} — {emo} ({conf:.3f})"
+                for ts, emo, conf in reversed(self.timeline.last(self.recent))]
+        return "Recent detections:\n" + "\n".join(rows)
+
+    def update(self, empty_text="No detections yet — capture a frame or start auto-capture."):
+        """Paint what changed since the last call; returns True if anything was sent."""
+        n = len(self.timeline)
+        if not n:
+            return self._recent.paint("info", empty_text)
+        if self._chart is not None and n == self._chart_n:
+            return False
+        self._recent.paint("markdown", self._memoized("recent", n, self._recent_text))
+
+        if self._chart is None or n < self._chart_n or self._appended + (n - self._chart_n) > self.max_points:
+            confidences = self._memoized("downsampled", n, lambda: self.timeline.downsample(max_points=self.max_points)[1])
+            self._chart = self._chart_slot.line_chart({"confidence": confidences})
+            self._appended = 0
+        else:
+            self._chart.add_rows({"confidence": np.asarray(self.timeline.confidence[self._chart_n:n], dtype=np.float64)})
+            self._appended += n - self._chart_n
+        self._chart_n = n
+
+        # shares change slowly: repaint when a new minute starts, else at most every share_every seconds
+        minutes, shares = self._memoized("shares", n, self.timeline.share_per_minute)
+        now = time.time()
+        new_minute = self._share.last_key is None or self._share.last_key[0] != len(minutes)
+        if len(minutes) > 1 and (new_minute or now - self._share_at >= self.share_every):
+            self._share.paint("area_chart", {label: shares[:, i] for i, label in enumerate(LABELS) if shares[:, i].any()},
+                              key=(len(minutes), n))
+            self._share_at = now
+        return True
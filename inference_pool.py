@@ -0,0 +1,273 @@
+# inference_pool.py — multi-core emotion inference shared by all sessions of a process
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from frames import Frame
+
+SLOT_SHAPE = (240, 320, 3)  # analyze_emotion downscales to 320x240 anyway
+
+
+def _process_worker(slot_names, slot_shape, tasks, results):
+    """Worker process: warms its own model, then analyzes frames straight out of shared memory."""
+    from emotion_analysis import _analyze_local
+    from model_registry import warm_models
+    warm_models()
+    shms = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    views = [np.ndarray(slot_shape, dtype=np.uint8, buffer=shm.buf) for shm in shms]
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, slot, order = task
+        try:
+            result = _analyze_local(Frame(views[slot], order))
+        except Exception as e:
+            print("Pool worker error:", e)
+            result = ("Error", 0.0)
+        results.put((task_id, slot, result))
+    del views
+    for shm in shms:
+        shm.close()
+
+
+class InferencePool:
+    """
+    Runs analyze_emotion_result on `workers` threads or processes.
+    - process mode: frames are resized straight into shared-memory slots; only slot indices are pickled.
+    - backpressure: at most 2 * workers frames in flight, and at most `max_pending` queued per session
+      (older queued frames of a session are dropped and resolve to ("Dropped", 0.0)).
+    - fairness: queued requests are dispatched round-robin across sessions.
+    - failures: analyze() waits at most `timeout` seconds; a dispatch error, a dead worker process or
+      close() fails every queued and in-flight future, and the pool refuses new work (see .error).
+    """
+    def __init__(self, workers=None, mode="thread", max_pending=2, timeout=5.0):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown pool mode: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.error = None
+        self.dropped = 0
+        self.completed = 0
+
+        self._cond = threading.Condition()
+        self._pending = {}      # session -> deque[(task_id, frame, future)]
+        self._order = deque()   # sessions with pending work, round-robin order
+        self._futures = {}      # task_id -> future (in flight)
+        self._scales = {}       # process mode: task_id -> (sx, sy) from slot back to frame pixels
+        self._ids = itertools.count()
+        self._closed = False
+
+        n_slots = 2 * self.workers
+        self._free_slots = deque(range(n_slots))
+        self._slot_cond = threading.Condition()
+
+        if mode == "process":
+            ctx = mp.get_context("spawn")
+            nbytes = int(np.prod(SLOT_SHAPE))
+            self._shms = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(n_slots)]
+            self._views = [np.ndarray(SLOT_SHAPE, dtype=np.uint8, buffer=shm.buf) for shm in self._shms]
+            self._tasks = ctx.Queue()
+            self._results = ctx.Queue()
+            names = [shm.name for shm in self._shms]
+            self._procs = [ctx.Process(target=_process_worker, args=(names, SLOT_SHAPE, self._tasks, self._results), daemon=True)
+                           for _ in range(self.workers)]
+            for p in self._procs:
+                p.start()
+            self._threads = [threading.Thread(target=self._collect_loop, daemon=True)]
+        else:
+            self._tasks = queue.Queue()
+            self._threads = [threading.Thread(target=self._thread_worker, daemon=True) for _ in range(self.workers)]
+        self._threads.append(threading.Thread(target=self._dispatch_loop, daemon=True))
+        for t in self._threads:
+            t.start()
+
+    # ---- public API
+    def submit(self, frame, session="default"):
+        """Queue an RGB frame (or frames.Frame) for a session; returns a Future of an EmotionResult."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(self.error or "InferencePool is closed")
+            q = self._pending.setdefault(session, deque())
+            if not q:
+                self._order.append(session)
+            if len(q) >= self.max_pending:
+                _, _, old = q.popleft()
+                old.set_result(("Dropped", 0.0))
+                self.dropped += 1
+            q.append((next(self._ids), frame, future))
+            self._cond.notify()
+        return future
+
+    def analyze(self, frame, session="default", timeout=None):
+        """
+        Blocking helper: an emotion_analysis.EmotionResult, or an (emotion, confidence) tuple when dropped.
+        Raises concurrent.futures.TimeoutError after timeout (default self.timeout) seconds.
+        """
+        return self.result(self.submit(frame, session=session), timeout)
+
+    def result(self, future, timeout=None):
+        """Wait for a submit() future (at most timeout, default self.timeout, seconds)."""
+        return future.result(timeout or self.timeout)
+
+    def stats(self):
+        with self._cond:
+            queued = sum(len(q) for q in self._pending.values())
+        return {"mode": self.mode, "workers": self.workers, "queued": queued,
+                "in_flight": len(self._futures), "completed": self.completed, "dropped": self.dropped}
+
+    def close(self):
+        self._abort("InferencePool is closed", failed=False)
+        for _ in range(self.workers):
+            self._tasks.put(None)
+        if self.mode == "process":
+            for p in self._procs:
+                p.join(timeout=5)
+            self._results.put(None)
+            del self._views
+            for shm in self._shms:
+                shm.close()
+                shm.unlink()
+
+    # ---- internals
+    def _abort(self, error, failed=True):
+        """Stop accepting and dispatching work; every queued and in-flight future fails with error."""
+        with self._cond:
+            if failed and not self._closed:
+                self.error = error
+            self._closed = True
+            futures = [future for q in self._pending.values() for _, _, future in q]
+            futures += self._futures.values()
+            self._pending.clear()
+            self._order.clear()
+            self._futures = {}
+            self._cond.notify_all()
+        with self._slot_cond:
+            self._slot_cond.notify_all()
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError(error))
+
+    def _acquire_slot(self):
+        with self._slot_cond:
+            while not self._free_slots and not self._closed:
+                self._slot_cond.wait()
+            return None if self._closed else self._free_slots.popleft()
+
+    def _release_slot(self, slot):
+        with self._slot_cond:
+            self._free_slots.append(slot)
+            self._slot_cond.notify()
+
+    def _next_request(self):
+        with self._cond:
+            while not self._order and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            session = self._order.popleft()
+            q = self._pending[session]
+            item = q.popleft()
+            if q:
+                self._order.append(session)
+            else:
+                del self._pending[session]
+            return item
+
+    def _dispatch_loop(self):
+        try:
+            while True:
+                slot = self._acquire_slot()
+                if slot is None:
+                    return
+                item = self._next_request()
+                if item is None:
+                    return
+                self._dispatch(slot, *item)
+        except Exception as e:
+            print("Pool dispatch error:", e)
+            traceback.print_exc()
+            self._abort(f"inference pool dispatch failed: {e}")
+
+    def _dispatch(self, slot, task_id, frame, future):
+        with self._cond:
+            self._futures[task_id] = future
+        try:
+            if self.mode == "process":
+                frame = Frame.wrap(frame)
+                cv2.resize(frame.data, (SLOT_SHAPE[1], SLOT_SHAPE[0]), dst=self._views[slot])
+                self._scales[task_id] = (frame.shape[1] / SLOT_SHAPE[1], frame.shape[0] / SLOT_SHAPE[0])
+                self._tasks.put((task_id, slot, frame.order))
+            else:
+                self._tasks.put((task_id, frame, slot))
+        except Exception as e:
+            # a bad frame fails its own request only
+            with self._cond:
+                self._futures.pop(task_id, None)
+            self._scales.pop(task_id, None)
+            self._release_slot(slot)
+            if not future.done():
+                future.set_exception(e)
+
+    def _finish(self, task_id, slot, result):
+        with self._cond:
+            future = self._futures.pop(task_id, None)
+        scale = self._scales.pop(task_id, None)
+        if scale is not None and getattr(result, "box", None) is not None:
+            x, y, w, h = result.box
+            result.box = (int(x * scale[0]), int(y * scale[1]), int(w * scale[0]), int(h * scale[1]))
+        self._release_slot(slot)
+        self.completed += 1
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def _thread_worker(self):
+        from emotion_analysis import _analyze_local
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            task_id, frame, slot = task
+            try:
+                result = _analyze_local(frame)
+            except Exception as e:
+                print("Pool worker error:", e)
+                traceback.print_exc()
+                result = ("Error", 0.0)
+            self._finish(task_id, slot, result)
+
+    def _collect_loop(self):
+        while True:
+            try:
+                item = self._results.get(timeout=1.0)
+            except queue.Empty:
+                # a crashed worker takes its task with it: fail everything rather than wait forever
+                dead = [p for p in self._procs if not p.is_alive()]
+                if dead and not self._closed:
+                    self._abort(f"inference worker process died (exit code {dead[0].exitcode})")
+                    return
+                continue
+            if item is None:
+                return
+            self._finish(*item)
+
+
+def pool_from_env():
+    """InferencePool configured by INFERENCE_POOL=thread|process and INFERENCE_WORKERS, or None if unset."""
+    mode = os.environ.get("INFERENCE_POOL", "").strip().lower()
+    if not mode:
+        return None
+    workers = int(os.environ.get("INFERENCE_WORKERS", "0")) or None
+    return InferencePool(workers=workers, mode=mode)
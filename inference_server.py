@@ -0,0 +1,365 @@
+# inference_server.py — one warm emotion model per host, shared by every UI process over a socket
+#
+#   python inference_server.py --unix /tmp/trainer.sock            (or --port 8765 for localhost TCP)
+#   INFERENCE_SERVER=unix:/tmp/trainer.sock streamlit run main_polished.py
+#
+# Protocol (little-endian, any number of pipelined requests per connection):
+#   request:  "EMO1" | id u32 | height u16 | width u16 | channels u8 | order u8 | session_len u16
+#             | session utf-8 | height*width*channels uint8 pixels
+#   response: id u32 | status u8 (0 ok, 1 error) | confidence f32 | box 4*i16 (-1 = none)
+#             | probs 7*f32 (NaN = none) | label_len u8 | model_len u8 | label | model
+# Requests from all connections are batched together (round-robin across sessions) until
+# max_batch frames are waiting or the oldest has waited max_wait_ms, then run in one forward pass.
+import argparse
+import itertools
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import cv2
+import numpy as np
+
+from frames import Frame
+from perf_metrics import METRICS
+
+MAGIC = b"EMO1"
+REQUEST = struct.Struct("<4sIHHBBH")
+RESPONSE = struct.Struct("<IBf4h7fBB")
+ORDERS = ("BGR", "RGB", "GRAY")
+SEND_SIZE = (320, 240)   # the server analyzes at 320x240, so clients never send more
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if not k:
+            raise ConnectionError("connection closed")
+        got += k
+    return buf
+
+
+def encode_request(request_id, frame, session):
+    frame = Frame.wrap(frame)
+    data = np.ascontiguousarray(frame.data)
+    h, w = data.shape[:2]
+    c = data.shape[2] if data.ndim == 3 else 1
+    s = session.encode("utf-8")[:65535]
+    return REQUEST.pack(MAGIC, request_id, h, w, c, ORDERS.index(frame.order), len(s)) + s + data.tobytes()
+
+
+def read_request(sock):
+    magic, request_id, h, w, c, order, s_len = REQUEST.unpack(_recv_exact(sock, REQUEST.size))
+    if magic != MAGIC:
+        raise ValueError("bad request magic")
+    session = bytes(_recv_exact(sock, s_len)).decode("utf-8") if s_len else "default"
+    pixels = np.frombuffer(_recv_exact(sock, h * w * c), dtype=np.uint8)
+    shape = (h, w, c) if c > 1 else (h, w)
+    return request_id, session, Frame(pixels.reshape(shape), ORDERS[order])
+
+
+def encode_response(request_id, result):
+    box = result.box if result.box is not None else (-1, -1, -1, -1)
+    probs = result.probs if result.probs is not None else [float("nan")] * 7
+    label = str(result.label).encode("utf-8")[:255]
+    model = str(result.model or "").encode("utf-8")[:255]
+    status = 1 if result.label == "Error" else 0
+    return RESPONSE.pack(request_id, status, float(result.confidence), *box, *probs, len(label), len(model)) + label + model
+
+
+def read_response(sock):
+    from emotion_analysis import EmotionResult
+    fields = RESPONSE.unpack(_recv_exact(sock, RESPONSE.size))
+    request_id, _, conf = fields[:3]
+    box = tuple(fields[3:7])
+    probs = np.array(fields[7:14], dtype=np.float32)
+    label_len, model_len = fields[14:]
+    tail = bytes(_recv_exact(sock, label_len + model_len))
+    label, model = tail[:label_len].decode("utf-8"), tail[label_len:].decode("utf-8") or None
+    return request_id, EmotionResult(label, round(conf, 3), None if np.isnan(probs).all() else probs,
+                                     None if box[0] < 0 else box, model=model)
+
+
+class DynamicBatcher:
+    """Collects requests from every connection and runs them as batches on `workers` threads."""
+    def __init__(self, max_batch=16, max_wait_ms=10.0, workers=1):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.frames = 0
+        self._pending = OrderedDict()     # session -> deque[(arrival, frame, reply)]
+        self._count = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._loop, daemon=True) for _ in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, session, frame, reply):
+        """reply(EmotionResult) is called from a batch thread."""
+        with self._cond:
+            self._pending.setdefault(session, deque()).append((time.monotonic(), frame, reply))
+            self._count += 1
+            METRICS.set_gauge("server_queue_depth", self._count)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _oldest(self):
+        return min(q[0][0] for q in self._pending.values())
+
+    def _take_batch(self):
+        with self._cond:
+            while True:
+                while not self._count and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return None
+                # wait for more requests until the batch is full or the oldest one hits its deadline
+                while 0 < self._count < self.max_batch and not self._closed:
+                    remaining = self._oldest() + self.max_wait - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return None
+                if self._count:
+                    break
+                # another batch thread took everything while this one waited: start over
+            batch = []
+            while self._pending and len(batch) < self.max_batch:
+                # one request per session per round keeps a busy session from starving the others
+                for session in list(self._pending):
+                    q = self._pending[session]
+                    batch.append(q.popleft())
+                    if not q:
+                        del self._pending[session]
+                    if len(batch) == self.max_batch:
+                        break
+            self._count -= len(batch)
+            METRICS.set_gauge("server_queue_depth", self._count)
+            return batch
+
+    def _loop(self):
+        from emotion_analysis import EmotionResult, analyze_emotions_batch_result
+        while True:
+            try:
+                batch = self._take_batch()
+            except Exception as e:
+                # never let a batch thread die: the server would silently lose capacity
+                print("Inference server batching error:", e)
+                traceback.print_exc()
+                continue
+            if batch is None:
+                return
+            now = time.monotonic()
+            for arrival, _, _ in batch:
+                METRICS.observe("server_queue_wait", now - arrival)
+            try:
+                with METRICS.span("server_batch"):
+                    results = analyze_emotions_batch_result([frame for _, frame, _ in batch])
+            except Exception as e:
+                print("Inference server batch error:", e)
+                results = [EmotionResult("Error") for _ in batch]
+            self.batches += 1
+            self.frames += len(batch)
+            METRICS.inc("server_frames", len(batch))
+            METRICS.set_gauge("server_mean_batch", round(self.frames / self.batches, 2))
+            for (_, _, reply), result in zip(batch, results):
+                reply(result)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        lock = threading.Lock()
+
+        def reply_to(request_id):
+            def reply(result):
+                data = encode_response(request_id, result)
+                try:
+                    with lock:
+                        sock.sendall(data)
+                except OSError:
+                    pass      # client went away; nothing to do
+            return reply
+
+        try:
+            while True:
+                request_id, session, frame = read_request(sock)
+                self.server.batcher.submit(session, frame, reply_to(request_id))
+        except (ConnectionError, OSError, ValueError):
+            return
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def serve(unix=None, host="127.0.0.1", port=8765, max_batch=16, max_wait_ms=10.0, workers=1, warm=True):
+    """Start the server on a background thread; returns it (server.shutdown() to stop)."""
+    if warm:
+        from model_registry import warm_models
+        warm_models()
+    if unix:
+        if os.path.exists(unix):
+            os.remove(unix)
+        server = _UnixServer(unix, _Handler)
+    else:
+        server = _TCPServer((host, port), _Handler)
+    server.batcher = DynamicBatcher(max_batch=max_batch, max_wait_ms=max_wait_ms, workers=workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class InferenceClient:
+    """
+    Dispatcher for emotion_analysis.set_dispatcher(): analyze(frame, session) sends the frame
+    (downscaled to 320x240) to the inference server and returns an EmotionResult in frame pixels.
+    One connection is shared by all threads; requests are pipelined and matched by id. Each
+    connection has its own pending map, so losing one never fails requests sent on the next.
+    """
+    def __init__(self, address, timeout=5.0):
+        self.address = address
+        self.timeout = timeout
+        self._sock = None
+        self._futures = {}      # request id -> future, for the current connection only
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.connect(self.address)
+        self._sock = sock
+        self._futures = {}
+        threading.Thread(target=self._read_loop, args=(sock, self._futures), daemon=True).start()
+
+    def _read_loop(self, sock, futures):
+        try:
+            while True:
+                request_id, result = read_response(sock)
+                with self._lock:
+                    future = futures.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(result)
+        except (ConnectionError, OSError):
+            pass
+        with self._lock:
+            if self._sock is sock:
+                self._sock = None
+            # fail whatever was in flight on this connection; the next call reconnects
+            failed = [f for f in futures.values() if not f.done()]
+            futures.clear()
+        for f in failed:
+            f.set_exception(ConnectionError("inference server connection lost"))
+
+    def submit(self, frame, session="default"):
+        frame = Frame.wrap(frame)
+        h, w = frame.shape[:2]
+        small = frame if w <= SEND_SIZE[0] and h <= SEND_SIZE[1] else \
+            Frame(cv2.resize(frame.data, SEND_SIZE, interpolation=cv2.INTER_AREA), frame.order)
+        future = Future()
+        future.scale = (w / small.shape[1], h / small.shape[0])
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            request_id = next(self._ids) & 0xFFFFFFFF
+            self._futures[request_id] = future
+            future.pending = (self._futures, request_id)
+            try:
+                self._sock.sendall(encode_request(request_id, small, session))
+            except OSError:
+                self._futures.pop(request_id, None)
+                self._sock.close()
+                self._sock = None
+                raise
+        return future
+
+    def analyze(self, frame, session="default", timeout=None):
+        return self.result(self.submit(frame, session), timeout)
+
+    def result(self, future, timeout=None):
+        """EmotionResult of a submit() future, box scaled back to the submitted frame's pixels."""
+        try:
+            result = future.result(timeout or self.timeout)
+        except FutureTimeoutError:
+            # a late reply is simply dropped by the read loop
+            futures, request_id = future.pending
+            with self._lock:
+                futures.pop(request_id, None)
+            raise
+        if result.box is not None:
+            sx, sy = future.scale
+            x, y, w, h = result.box
+            result.box = (int(x * sx), int(y * sy), int(w * sx), int(h * sy))
+        return result
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+
+def parse_address(spec):
+    """"unix:/path.sock" -> "/path.sock"; "host:port" or "tcp:host:port" -> (host, port)."""
+    if spec.startswith("unix:"):
+        return spec[len("unix:"):]
+    spec = spec[len("tcp:"):] if spec.startswith("tcp:") else spec
+    host, _, port = spec.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def client_from_env():
+    """InferenceClient for INFERENCE_SERVER (unix:/path or host:port), or None to analyze in-process."""
+    spec = os.environ.get("INFERENCE_SERVER")
+    return InferenceClient(parse_address(spec)) if spec else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve emotion inference to local UI processes.")
+    parser.add_argument("--unix", help="Unix socket path (default: TCP on --host/--port)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=16, help="largest batch per forward pass")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="longest a request waits for its batch to fill")
+    parser.add_argument("--workers", type=int, default=1, help="batch threads (each runs one forward pass at a time)")
+    parser.add_argument("--metrics-port", type=int, help="also serve /metrics on this port")
+    args = parser.parse_args(argv)
+
+    server = serve(args.unix, args.host, args.port, args.max_batch, args.max_wait_ms, args.workers)
+    if args.metrics_port:
+        from perf_metrics import serve_metrics
+        serve_metrics(args.metrics_port)
+    print(f"Inference server listening on {args.unix or f'{args.host}:{args.port}'}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        server.batcher.close()
+
+
+if __name__ == "__main__":
+    main()
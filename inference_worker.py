@@ -0,0 +1,185 @@
+# inference_worker.py — capture thread -> latest-frame buffer -> inference thread
+import threading
+import time
+import traceback
+from collections import deque
+
+import cv2
+
+from frames import Frame
+from perf_metrics import METRICS
+
+
+class LatestFrameBuffer:
+    """Bounded ring buffer of (seq, timestamp, frame); when full the oldest frame is dropped."""
+    def __init__(self, capacity=1):
+        self._frames = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self.seq = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def put(self, frame):
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+                METRICS.inc("frames_dropped")
+            self.seq += 1
+            self._frames.append((self.seq, time.time(), frame))
+            METRICS.set_gauge("queue_depth", len(self._frames))
+            self._cond.notify_all()
+
+    def get_latest(self, timeout=None):
+        """Take the newest frame and discard anything older; None if nothing arrived within timeout."""
+        with self._cond:
+            if not self._frames:
+                self._cond.wait(timeout)
+            if not self._frames:
+                return None
+            item = self._frames.pop()
+            if self._frames:
+                self.dropped += len(self._frames)
+                METRICS.inc("frames_dropped", len(self._frames))
+                self._frames.clear()
+            METRICS.set_gauge("queue_depth", 0)
+            return item
+
+
+class CaptureThread(threading.Thread):
+    """
+    Reads the camera as fast as it delivers and publishes BGR Frames (no color conversion) into the buffer.
+    Reading continuously keeps the driver queue drained, so the newest frame is never a stale one.
+    """
+    def __init__(self, cap, buffer):
+        super().__init__(daemon=True)
+        self.cap = cap
+        try:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # not every backend honours it
+        except Exception:
+            pass
+        self.buffer = buffer
+        self.latest = None  # newest (seq, ts, Frame) for display
+        self.captured = 0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            with METRICS.span("capture"):
+                ret, frame = self.cap.read()
+            if not ret or frame is None:
+                self.error = "Frame read failed (camera returned no frame)."
+                break
+            frame = Frame(frame, "BGR")
+            self.buffer.put(frame)
+            self.latest = (self.buffer.seq, time.time(), frame)
+            self.captured += 1
+            METRICS.inc("frames_captured")
+
+
+class InferenceWorker(threading.Thread):
+    """
+    Consumes the newest buffered frame, runs handler(ts, frame) -> [(ts, emotion, confidence), ...]
+    and queues the results. Runs at most once per min_interval seconds, or, with an
+    adaptive_scheduler.AdaptiveScheduler, skips unchanged frames and paces itself by the scheduler.
+    """
+    def __init__(self, buffer, handler, min_interval=0.0, scheduler=None):
+        super().__init__(daemon=True)
+        self.buffer = buffer
+        self.handler = handler
+        self.min_interval = min_interval
+        self.scheduler = scheduler
+        self.analyzed = 0
+        self.skipped = 0
+        self.last_latency = 0.0
+        self._results = deque(maxlen=256)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def drain(self):
+        """Results produced since the last drain(), oldest first."""
+        with self._lock:
+            results = list(self._results)
+            self._results.clear()
+        return results
+
+    def run(self):
+        while not self._stop_event.is_set():
+            item = self.buffer.get_latest(timeout=0.5)
+            if item is None:
+                continue
+            _, ts, frame = item
+            if self.scheduler is not None and not self.scheduler.should_analyze(frame, ts):
+                self.skipped += 1
+                METRICS.inc("frames_skipped")
+                self._stop_event.wait(self.scheduler.poll_interval)
+                continue
+            t0 = time.perf_counter()
+            try:
+                results = self.handler(ts, frame)
+            except Exception as e:
+                print("Inference worker error:", e)
+                traceback.print_exc()
+                results = [(ts, "Error", 0.0)]
+            self.last_latency = time.perf_counter() - t0
+            self.analyzed += 1
+            METRICS.observe("inference", self.last_latency)
+            METRICS.inc("frames_analyzed")
+            with self._lock:
+                self._results.extend(results)
+            if self.scheduler is not None:
+                self.scheduler.observe(results, self.last_latency)
+                self._stop_event.wait(self.scheduler.next_delay(self.last_latency))
+            else:
+                # honour the minimum analysis period without adding to latency when inference is slower
+                self._stop_event.wait(max(0.0, self.min_interval - self.last_latency))
+
+
+class InferencePipeline:
+    """Decouples capture, inference and display: the UI only renders latest_frame() and drain()."""
+    def __init__(self, cap, handler, min_interval=0.0, buffer_size=1, scheduler=None):
+        self.buffer = LatestFrameBuffer(capacity=buffer_size)
+        self.capture = CaptureThread(cap, self.buffer)
+        self.worker = InferenceWorker(self.buffer, handler, min_interval=min_interval, scheduler=scheduler)
+
+    def start(self):
+        self.capture.start()
+        self.worker.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self.capture.stop()
+        self.worker.stop()
+        self.capture.join(timeout)
+        self.worker.join(timeout)
+
+    @property
+    def error(self):
+        return self.capture.error
+
+    def latest_frame(self):
+        return self.capture.latest
+
+    def drain(self):
+        return self.worker.drain()
+
+    def stats(self):
+        stats = {
+            "captured": self.capture.captured,
+            "analyzed": self.worker.analyzed,
+            "skipped": self.worker.skipped,
+            "dropped": self.buffer.dropped,
+            "queue_depth": len(self.buffer),
+            "last_latency_s": round(self.worker.last_latency, 3),
+        }
+        if self.worker.scheduler is not None:
+            stats["scheduler"] = self.worker.scheduler.stats()
+        return stats
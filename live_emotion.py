@@ -0,0 +1,88 @@
+# live_emotion.py — streamlit-webrtc VideoProcessor with async emotion analysis + overlay
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import av
+import cv2
+from streamlit_webrtc import VideoProcessorBase
+
+from emotion_analysis import analyze_emotion, EmotionSmoother
+from face_tracking import FaceTracker
+from frames import Frame
+
+
+class EmotionVideoProcessor(VideoProcessorBase):
+    """
+    Returns every incoming frame immediately with the last known label drawn on it.
+    Every Kth frame (when no analysis is already running) a 320x240 copy is handed to a
+    background thread; K follows the measured inference latency so the video never waits.
+    """
+    def __init__(self, min_skip=1, max_skip=30, smoother_window=5, smoother_mode="window"):
+        self.min_skip = min_skip
+        self.max_skip = max_skip
+        self.skip = min_skip          # K: analyze every Kth frame
+        self.smoother = EmotionSmoother(window_size=smoother_window, mode=smoother_mode)
+        self.tracker = FaceTracker()
+        self.label = ("Waiting", 0.0)
+        self.stable = ("No Data", 0.0)
+        self.fps = 0.0                # incoming frame rate (EMA)
+        self.latency = 0.0            # inference latency in seconds (EMA)
+        self.analyzed = 0
+        self._frames = 0
+        self._last_recv = None
+        self._busy = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
+        img = frame.to_ndarray(format="bgr24")
+        now = time.perf_counter()
+        if self._last_recv is not None and now > self._last_recv:
+            inst = 1.0 / (now - self._last_recv)
+            self.fps = inst if self.fps == 0.0 else 0.9 * self.fps + 0.1 * inst
+        self._last_recv = now
+        self._frames += 1
+
+        with self._lock:
+            start = not self._busy and self._frames % self.skip == 0
+            if start:
+                self._busy = True
+        if start:
+            # the small copy is all the model needs, and the overlay below can't leak into it
+            small = cv2.resize(img, (320, 240))
+            self._executor.submit(self._analyze, small)
+
+        with self._lock:
+            (emo, conf), (stable, stable_conf) = self.label, self.stable
+        cv2.putText(img, f"{emo} ({conf})", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+        cv2.putText(img, f"Stable: {stable} ({stable_conf})", (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+        return av.VideoFrame.from_ndarray(img, format="bgr24")
+
+    def _analyze(self, small):
+        t0 = time.perf_counter()
+        try:
+            emo, conf = analyze_emotion(Frame(small, "BGR"), tracker=self.tracker)
+        except Exception as e:
+            print("Live analyze error:", e)
+            emo, conf = "Error", 0.0
+        latency = time.perf_counter() - t0
+        with self._lock:
+            self.latency = latency if self.analyzed == 0 else 0.8 * self.latency + 0.2 * latency
+            self.analyzed += 1
+            self.label = (emo, conf)
+            self.smoother.update(emo, float(conf))
+            self.stable = self.smoother.get_stable_emotion()
+            # frames that arrive during one inference: no point analyzing more often than that
+            if self.fps > 0:
+                self.skip = min(self.max_skip, max(self.min_skip, math.ceil(self.latency * self.fps)))
+            self._busy = False
+
+    def stats(self):
+        with self._lock:
+            return {"label": self.label, "stable": self.stable, "skip": self.skip,
+                    "fps": round(self.fps, 1), "latency_s": round(self.latency, 3), "analyzed": self.analyzed}
+
+    def on_ended(self):
+        self._executor.shutdown(wait=False)
@@ -1,32 +1,69 @@
 # main.py — AI Virtual Interview Trainer (camera_input, safe + working)
 import streamlit as st
-import cv2
 from PIL import Image
 import numpy as np
-from emotion_analysis import analyze_emotion, EmotionSmoother
-from speech_analysis import record_and_analyze
+from perf_metrics import render_perf_panel
+from features import sidebar_toggles
 import time
 
+# emotion_analysis / speech_analysis (and with them DeepFace, TensorFlow, speech_recognition)
+# are imported inside the sections that use them, so a disabled feature costs nothing at startup
+
 # Page setup
 st.set_page_config(page_title="AI Virtual Interview Trainer", layout="wide")
 st.title("🎯 AI Virtual Interview Trainer — Safe Mode (camera_input)")
 st.write("*Phase 2+ — Emotion (Single + Pseudo-Live) and Speech Sentiment*")
 
+# warm models once per process (shared by every session / rerun); runs at the end of the script,
+# after the page has been painted
+@st.cache_resource(show_spinner="Loading emotion models...")
+def load_models():
+    from model_registry import warm_models
+    return warm_models()
+
+# near-identical frames (and reruns re-submitting the same camera_input image) are answered
+# from a small result cache instead of the model (FRAME_CACHE=0 turns it off)
+@st.cache_resource
+def load_frame_cache():
+    from frame_cache import cache_from_env
+    return cache_from_env()
+
+# one camera handle per process, opened on first capture and kept open across reruns
+@st.cache_resource
+def load_camera():
+    from camera_manager import get_camera
+    return get_camera()
+
+features = sidebar_toggles()
+emotion_on = "emotion" in features
+speech_on = "speech" in features
+if emotion_on:
+    from emotion_analysis import analyze_emotion, EmotionSmoother, set_cache
+    from frames import Frame
+    set_cache(load_frame_cache())
+if "session_id" not in st.session_state:
+    # keys this session's entries in the frame cache
+    st.session_state.session_id = f"session-{id(st.session_state)}-{time.time()}"
+session_id = st.session_state.session_id
+if speech_on:
+    from speech_analysis import record_and_analyze
+models_placeholder = st.empty()
+
 col1, col2 = st.columns(2)
 
 # ---------------- Single-frame capture (works reliably)
 with col1:
     st.header("👀 Facial Emotion Detection (Single Frame)")
-    if st.button("Capture Frame & Analyze Emotion"):
-        cap = cv2.VideoCapture(0)
-        ret, frame = cap.read()
-        cap.release()
-        if not ret or frame is None:
+    if not emotion_on:
+        st.info("Emotion detection is off (sidebar).")
+    elif st.button("Capture Frame & Analyze Emotion"):
+        frame = load_camera().snapshot()
+        if frame is None:
             st.error("❌ Could not access webcam. Make sure camera is free and allowed.")
         else:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             try:
-                result = analyze_emotion(frame_rgb)
+                # analyze the BGR frame as-is (no RGB conversion copy)
+                result = analyze_emotion(Frame(frame, "BGR"), session=session_id)
                 if isinstance(result, tuple):
                     emo, conf = result
                 else:
@@ -35,13 +72,14 @@ with col1:
                 emo, conf = "Error", 0.0
                 print("Single-frame analyze error:", e)
 
-            img = Image.fromarray(frame_rgb)
-            st.image(img, caption=f"Detected Emotion: {emo} ({conf})", use_container_width=True)
+            st.image(frame, channels="BGR", caption=f"Detected Emotion: {emo} ({conf})", use_container_width=True)
 
 # ---------------- Speech sentiment (unchanged)
 with col2:
     st.header("🎙 Speech Sentiment Analysis")
-    if st.button("Record & Analyze Speech"):
+    if not speech_on:
+        st.info("Speech sentiment is off (sidebar).")
+    elif st.button("Record & Analyze Speech"):
         with st.spinner("Listening for 5 seconds..."):
             text, sentiment = record_and_analyze()
         if text:
@@ -50,88 +88,98 @@ with col2:
         else:
             st.error(sentiment)
 
-st.write("---")
-st.caption("Below is a safe *pseudo-live* mode using the browser camera input (no WebRTC).")
-
-# ---------------- Pseudo-live using st.camera_input + smoothing ----------------
-st.write("### 📹 Pseudo-Live Camera (press Capture repeatedly or Auto mode)")
-
-if "pseudo_running" not in st.session_state:
-    st.session_state.pseudo_running = False
-if "smoother" not in st.session_state:
-    st.session_state.smoother = EmotionSmoother(window_size=5)
-
-cols = st.columns([1, 1, 1])
-with cols[0]:
-    start = st.button("Start Auto Capture")
-with cols[1]:
-    stop = st.button("Stop Auto Capture")
-with cols[2]:
-    one_shot = st.button("Capture Now")
-
-# camera_input widget (returns an uploaded file-like object)
-camera_file = st.camera_input("Point your camera at your face and capture a frame here")
-
-# Start / Stop logic
-if start:
-    st.session_state.pseudo_running = True
-    st.experimental_rerun()
-
-if stop:
-    st.session_state.pseudo_running = False
-    st.experimental_rerun()
-
-# If user clicked Capture Now, analyze camera_file immediately
-if one_shot and camera_file is not None:
-    img = Image.open(camera_file).convert("RGB")
-    arr = np.array(img)
-    result = analyze_emotion(arr)
-    if isinstance(result, tuple):
-        emo, conf = result
-    else:
-        emo, conf = result, 0.0
-    st.success(f"Captured Emotion: {emo} ({conf})")
-    # update smoother
-    st.session_state.smoother.update(emo, float(conf))
-
-# Auto-capture loop: capture every ~1.5s while pseudo_running True
-# (We simulate a live view: the user must allow camera_input and stay on page.)
-if st.session_state.pseudo_running:
-    st.write("Auto capture running — capturing every 1.5s. Click Stop to end.")
-    # If no camera_file yet, show camera_input prompt and wait
-    if camera_file is None:
-        st.info("Please click the camera capture button (the camera_input widget) to allow the browser camera.")
-    else:
-        # analyze this captured camera_file
+# ---------------- Pseudo-live (emotion feature only) ----------------
+if emotion_on:
+    st.write("---")
+    st.caption("Below is a safe *pseudo-live* mode using the browser camera input (no WebRTC).")
+
+    # ---------------- Pseudo-live using st.camera_input + smoothing ----------------
+    st.write("### 📹 Pseudo-Live Camera (press Capture repeatedly or Auto mode)")
+
+    if "pseudo_running" not in st.session_state:
+        st.session_state.pseudo_running = False
+    if "smoother" not in st.session_state:
+        st.session_state.smoother = EmotionSmoother(window_size=5)
+
+    cols = st.columns([1, 1, 1])
+    with cols[0]:
+        start = st.button("Start Auto Capture")
+    with cols[1]:
+        stop = st.button("Stop Auto Capture")
+    with cols[2]:
+        one_shot = st.button("Capture Now")
+
+    # camera_input widget (returns an uploaded file-like object)
+    camera_file = st.camera_input("Point your camera at your face and capture a frame here")
+
+    # Start / Stop logic
+    if start:
+        st.session_state.pseudo_running = True
+        st.experimental_rerun()
+
+    if stop:
+        st.session_state.pseudo_running = False
+        st.experimental_rerun()
+
+    # If user clicked Capture Now, analyze camera_file immediately
+    if one_shot and camera_file is not None:
         img = Image.open(camera_file).convert("RGB")
         arr = np.array(img)
-        result = analyze_emotion(arr)
+        result = analyze_emotion(arr, session=session_id)
         if isinstance(result, tuple):
             emo, conf = result
         else:
             emo, conf = result, 0.0
+        st.success(f"Captured Emotion: {emo} ({conf})")
+        # update smoother
         st.session_state.smoother.update(emo, float(conf))
+
+    # Auto-capture loop: capture every ~1.5s while pseudo_running True
+    # (We simulate a live view: the user must allow camera_input and stay on page.)
+    if st.session_state.pseudo_running:
+        st.write("Auto capture running — capturing every 1.5s. Click Stop to end.")
+        # If no camera_file yet, show camera_input prompt and wait
+        if camera_file is None:
+            st.info("Please click the camera capture button (the camera_input widget) to allow the browser camera.")
+        else:
+            # analyze this captured camera_file
+            img = Image.open(camera_file).convert("RGB")
+            arr = np.array(img)
+            result = analyze_emotion(arr, session=session_id)
+            if isinstance(result, tuple):
+                emo, conf = result
+            else:
+                emo, conf = result, 0.0
+            st.session_state.smoother.update(emo, float(conf))
+            stable = st.session_state.smoother.get_stable_emotion()
+            if isinstance(stable, tuple):
+                label, conf_avg = stable
+                st.success(f"Stable Emotion: {label} ({conf_avg})")
+            else:
+                st.info(f"Stable Emotion: {stable}")
+
+            # Show current frame
+            st.image(img, caption=f"Captured (auto): {emo} ({conf})", use_container_width=True)
+
+            # Small pause so UI doesn't freeze; then rerun to re-capture via camera_input
+            time.sleep(1.5)
+            st.experimental_rerun()
+
+    # If not running auto-mode, show last stable result if present
+    if not st.session_state.pseudo_running:
         stable = st.session_state.smoother.get_stable_emotion()
         if isinstance(stable, tuple):
-            label, conf_avg = stable
-            st.success(f"Stable Emotion: {label} ({conf_avg})")
+            st.info(f"Last stable emotion: {stable[0]} ({stable[1]})")
         else:
-            st.info(f"Stable Emotion: {stable}")
+            st.info(f"Last stable emotion: {stable}")
 
-        # Show current frame
-        st.image(img, caption=f"Captured (auto): {emo} ({conf})", use_container_width=True)
-
-        # Small pause so UI doesn't freeze; then rerun to re-capture via camera_input
-        time.sleep(1.5)
-        st.experimental_rerun()
+if st.sidebar.checkbox("Show performance panel", value=False):
+    render_perf_panel()
 
-# If not running auto-mode, show last stable result if present
-if not st.session_state.pseudo_running:
-    stable = st.session_state.smoother.get_stable_emotion()
-    if isinstance(stable, tuple):
-        st.info(f"Last stable emotion: {stable[0]} ({stable[1]})")
-    else:
-        st.info(f"Last stable emotion: {stable}")
+# deferred warm-up: the page above is already on screen while the models load
+if emotion_on:
+    model_stats = load_models().stats
+    models_placeholder.caption(f"Models warm: {model_stats.get('warm')} — warm-up {model_stats.get('warm_s')}s, RSS {model_stats.get('rss_mb_after')} MB")
 
 st.write("---")
 st.caption("This mode is intentionally simple and reliable for demos — no WebRTC required.")
\ No newline at end of file
@@ -2,20 +2,23 @@ import streamlit as st
 import cv2
 from PIL import Image
 import numpy as np
+from camera_manager import get_camera
 
 st.set_page_config(page_title="AI Interview Trainer (Lite)", layout="wide")
 st.title("🎯 AI Interview Trainer — Cloud Demo (Lite Version)")
 
+@st.cache_resource
+def load_camera():
+    return get_camera()
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.header("📸 Facial Emotion Detection (Demo)")
     if st.button("Capture Frame"):
-        cap = cv2.VideoCapture(0)
-        ret, frame = cap.read()
-        cap.release()
+        frame = load_camera().snapshot()
 
-        if not ret:
+        if frame is None:
             st.error("❌ Could not access webcam.")
         else:
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -1,14 +1,18 @@
 # main_polished.py — AI Virtual Interview Trainer (Safe Mode, polished)
 import streamlit as st
-import cv2
-from PIL import Image
 import numpy as np
+import shutil
+import tempfile
 import time
-from collections import deque
 
 # import your modules (must exist in project)
-from emotion_analysis import analyze_emotion, EmotionSmoother
-from speech_analysis import record_and_analyze
+# the emotion and speech subsystems (DeepFace/TensorFlow, OpenCV, speech_recognition, ...) are
+# imported below only when their feature is enabled, so they never delay the first paint otherwise
+from perf_metrics import METRICS, render_perf_panel, serve_metrics
+from features import sidebar_toggles
+import os
+
+DISPLAY_FPS = 15  # preview refresh rate of the auto-capture loop
 
 # -----------------------
 # Helpers
@@ -36,201 +40,448 @@ st.set_page_config(page_title="AI Virtual Interview Trainer (Polished)", layout=
 st.title("🎯 AI Virtual Interview Trainer — Polished Safe Mode")
 st.write("Stable demo using browser camera input / OpenCV pseudo-live — history, confidence, and feedback")
 
+# which subsystems this session uses (defaults from TRAINER_FEATURES, see features.py)
+features = sidebar_toggles()
+emotion_on = "emotion" in features
+speech_on = "speech" in features
+if emotion_on:
+    import cv2
+    from PIL import Image
+    from emotion_timeline import EmotionTimeline
+    from incremental_render import HistoryView, PreviewView, Slot, encode_jpeg, PREVIEW_WIDTH, PREVIEW_QUALITY
+    from emotion_analysis import (analyze_emotion, analyze_emotion_result, analyze_faces, EmotionSmoother, FaceSmoothers,
+                                  FrameQueue, set_cache, set_dispatcher)
+    from face_tracking import FaceTracker, MultiFaceTracker
+    from inference_worker import InferencePipeline
+    from adaptive_scheduler import AdaptiveScheduler
+    from inference_server import InferenceClient
+    from video_ingest import VIDEO_TYPES, analyze_file, probe as probe_video
+if speech_on:
+    from speech_analysis import stream_and_analyze, analyze_segment, summarize_answer
+
+# optional shared inference server (INFERENCE_SERVER=unix:/path.sock|host:port, see inference_server.py),
+# else an optional multi-core pool shared by all sessions (INFERENCE_POOL=thread|process, INFERENCE_WORKERS=N)
+@st.cache_resource
+def load_pool():
+    from inference_pool import pool_from_env
+    from inference_server import client_from_env
+    pool = client_from_env() or pool_from_env()
+    set_dispatcher(pool)
+    return pool
+
+# near-identical frames (a seated candidate, reruns re-submitting the same camera_input image) are
+# answered from a small per-session result cache instead of the model (FRAME_CACHE=0 turns it off)
+@st.cache_resource
+def load_frame_cache():
+    from frame_cache import cache_from_env
+    cache = cache_from_env()
+    set_cache(cache)
+    return cache
+
+pool = load_pool() if emotion_on else None
+if emotion_on:
+    load_frame_cache()
+remote = emotion_on and isinstance(pool, InferenceClient)   # the model lives in the server process
+
+# warm models once per process (shared by every session / rerun); not needed when a server does inference.
+# Called at the end of the script so the page is painted before TensorFlow loads.
+@st.cache_resource(show_spinner="Loading emotion models...")
+def load_models():
+    from model_registry import warm_models
+    return warm_models()
+
+# optional Prometheus / JSON metrics endpoint (METRICS_PORT=9108 -> http://127.0.0.1:9108/metrics)
+@st.cache_resource
+def start_metrics_server():
+    port = os.environ.get("METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+start_metrics_server()
+
+# one camera per process: probed once (cached on disk), opened once, shared by every consumer
+@st.cache_resource
+def load_camera():
+    from camera_manager import get_camera
+    return get_camera()
+
+# one long-lived microphone capture per process (opened + calibrated on first use)
+@st.cache_resource
+def load_audio_service():
+    from audio_capture import AudioCaptureService
+    return AudioCaptureService(handler=analyze_segment).start()
+
+
+show_perf = st.sidebar.checkbox("Show performance panel", value=False)
+# persist frames, audio and results under sessions/ for offline re-analysis (python reanalyze.py sessions/)
+record = st.sidebar.checkbox("Record session to disk", value=False)
+perf_placeholder = st.sidebar.empty()
+models_placeholder = st.empty()
+
 # initialize session state
-if "history" not in st.session_state:
-    # store tuples (timestamp, emotion, confidence)
-    st.session_state.history = deque(maxlen=60)
-if "smoother" not in st.session_state:
-    st.session_state.smoother = EmotionSmoother(window_size=5)
+if emotion_on and "history" not in st.session_state:
+    # columnar (timestamp, emotion, confidence, probabilities) for the whole session
+    st.session_state.history = EmotionTimeline()
+if emotion_on:
+    smoothing = st.sidebar.selectbox("Emotion smoothing", EmotionSmoother.MODES, index=0,
+                                     help="window: majority of recent results · ema: moving average · probs: mean probabilities")
+    if "smoother" not in st.session_state or st.session_state.smoother.mode != smoothing:
+        st.session_state.smoother = EmotionSmoother(window_size=5, mode=smoothing, hysteresis=0.1 if smoothing != "window" else 0.0)
+    if "tracker" not in st.session_state:
+        # follows the face between auto-capture frames so detection runs only every few frames
+        st.session_state.tracker = FaceTracker(redetect_every=15)
+    # panel interviews / group recordings: every face is analyzed (one batched forward pass per frame),
+    # keeps its id across frames and has its own smoother; runs in-process, so not with the inference server
+    multi_face = st.sidebar.checkbox("Multi-face mode (panel / group)", value=False, disabled=remote,
+                                     help="Analyze all faces in the frame; each tracked face gets its own stable emotion.")
+    if "multi_tracker" not in st.session_state:
+        st.session_state.multi_tracker = MultiFaceTracker()
+    if "face_smoothers" not in st.session_state or st.session_state.face_smoothers.mode != smoothing:
+        st.session_state.face_smoothers = FaceSmoothers(window_size=5, mode=smoothing,
+                                                        hysteresis=0.1 if smoothing != "window" else 0.0)
+    # previews are sent as downscaled JPEGs (much less websocket traffic than full-size arrays)
+    preview_width = st.sidebar.slider("Preview width (px)", 240, 1280, PREVIEW_WIDTH, 80)
+    preview_quality = st.sidebar.slider("Preview JPEG quality", 30, 95, PREVIEW_QUALITY, 5)
+if "history_memo" not in st.session_state:
+    # derived history views (formatted rows, downsampled chart) reused across reruns
+    st.session_state.history_memo = {}
+if "session_id" not in st.session_state:
+    # fairness key for the shared inference pool
+    st.session_state.session_id = f"session-{id(st.session_state)}-{time.time()}"
 if "auto_running" not in st.session_state:
     st.session_state.auto_running = False
 if "cap" not in st.session_state:
     st.session_state.cap = None
+if record and st.session_state.get("recorder") is None:
+    from session_store import SessionRecorder
+    st.session_state.recorder = SessionRecorder(root="sessions")
+    if emotion_on:
+        # keep the timeline next to the recording as memory-mapped columns
+        timeline = EmotionTimeline(path=os.path.join(st.session_state.recorder.path, "timeline"))
+        timeline.extend(st.session_state.history)
+        st.session_state.history = timeline
+elif not record and st.session_state.get("recorder") is not None:
+    st.session_state.recorder.close()
+    st.session_state.recorder = None
+    if "history" in st.session_state:
+        st.session_state.history.flush()
+recorder = st.session_state.get("recorder")
+if recorder is not None:
+    st.sidebar.caption(f"Recording to {recorder.path} — {recorder.frames_written} frames")
 
 # layout
 col_left, col_right = st.columns([2, 1])
 
+# the history and feedback widgets are created before the left column so the auto-capture loop
+# can update them in place; each one is repainted only when its data changed
+with col_right:
+    st.header("📊 Emotion History & Feedback")
+    if not emotion_on:
+        st.info("Emotion detection is off (sidebar).")
+    else:
+        history_view = HistoryView(st.container(), st.session_state.history, st.session_state.history_memo)
+        st.write("---")
+        st.subheader("💡 Feedback")
+        feedback_label = Slot(st.empty())
+        feedback_tip = Slot(st.empty())
+        feedback_faces = Slot(st.empty())
+
+
+def analyze_video(upload, rate):
+    """Analyze an uploaded recording batch by batch, updating a progress bar and a chart as results arrive."""
+    # frames go through the same dispatcher as live capture (pool / inference server), so with
+    # INFERENCE_SERVER set no model is loaded in this process; multi-face mode is off in that case
+    # the decoders need a seekable file: copy the upload to disk in 1 MB chunks
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(upload.name)[1], delete=False) as tmp:
+        shutil.copyfileobj(upload, tmp, length=1 << 20)
+    try:
+        info = probe_video(tmp.name)
+        timeline = EmotionTimeline()
+        progress = st.progress(0.0, text="Decoding...")
+        view = HistoryView(st.container(), timeline, {}, clock=lambda ts: f"{int(ts // 60):02d}:{ts % 60:04.1f}")
+
+        def on_progress(done, _):
+            fraction = min(1.0, done / info["duration_s"]) if info["duration_s"] else 0.0
+            progress.progress(fraction, text=f"{len(timeline)} results — {done:.0f}s of video analyzed")
+            view.update()
+
+        summary = analyze_file(tmp.name, rate=rate, multi_face=multi_face, timeline=timeline, on_progress=on_progress)
+        progress.progress(1.0, text=f"Done — {summary['analyzed']} results in {summary['elapsed_s']}s")
+        return summary
+    finally:
+        os.remove(tmp.name)
+
+
+def render_feedback():
+    """Feedback for the last stable emotion (no-op when it did not change)."""
+    stable = st.session_state.smoother.get_stable_emotion()
+    if isinstance(stable, tuple):
+        label, conf_avg = stable
+        feedback_label.paint("write", f"**Stable emotion:** {label} — avg confidence {conf_avg}")
+        feedback_tip.paint("info", short_feedback(label))
+    else:
+        feedback_label.paint("write", f"**Stable emotion:** {stable}")
+        feedback_tip.paint("info", "Perform a few captures to get feedback.")
+    if multi_face:
+        faces = st.session_state.face_smoothers.get_stable_emotions()
+        feedback_faces.paint("markdown", "\n".join(f"- Face {face_id}: {label} ({conf})" for face_id, (label, conf) in faces.items())
+                             or "No faces tracked yet.")
+    else:
+        feedback_faces.paint("empty")
+
 # -----------------------
 # Left column: camera + capture
 # -----------------------
 with col_left:
     st.header("📸 Camera & Emotion Detection")
 
-    # Single capture via browser (optional)
-    camera_file = st.camera_input("Capture Image (click button below camera)")
+    if not emotion_on:
+        st.info("Emotion detection is off (sidebar).")
+    else:
+        # Single capture via browser (optional)
+        camera_file = st.camera_input("Capture Image (click button below camera)")
 
-    if camera_file is not None:
-        img = Image.open(camera_file).convert("RGB")
-        img_array = np.array(img)
-        try:
-            result = analyze_emotion(img_array)
-            if isinstance(result, tuple):
-                emo, conf = result
-            else:
-                emo, conf = result, 0.0
-        except Exception as e:
-            emo, conf = "Error", 0.0
-            st.error(f"Emotion analysis failed: {e}")
+        if camera_file is not None:
+            img = Image.open(camera_file).convert("RGB")
+            img_array = np.array(img)
+            try:
+                result = analyze_emotion(img_array, session=st.session_state.session_id)
+                if isinstance(result, tuple):
+                    emo, conf = result
+                else:
+                    emo, conf = result, 0.0
+            except Exception as e:
+                emo, conf = "Error", 0.0
+                st.error(f"Emotion analysis failed: {e}")
 
-        st.image(img, caption=f"Detected Emotion: {emo} ({conf})", use_column_width=True)
-        # add to history
-        st.session_state.history.append((time.time(), emo, float(conf)))
-        st.session_state.smoother.update(emo, float(conf))
+            st.image(encode_jpeg(img_array, preview_width, preview_quality), caption=f"Detected Emotion: {emo} ({conf})",
+                     use_column_width=True)
+            # add to history
+            st.session_state.history.append(time.time(), emo, float(conf))
+            st.session_state.smoother.update(emo, float(conf))
+            if recorder is not None:
+                recorder.add_frame(time.time(), cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR))
+                recorder.add_result(time.time(), emo, float(conf))
 
-    st.write("---")
-    st.subheader("🔁 Auto Capture (OpenCV single preview)")
-    st.caption("This opens the webcam once and updates a single live preview. Use Stop to end.")
-
-    interval = st.number_input("Capture interval (seconds):", min_value=0.5, max_value=5.0, value=1.5, step=0.5, format="%.1f")
-    start_col, stop_col = st.columns(2)
-    with start_col:
-        if st.button("▶️ Start Auto Capture"):
-            # start camera
-            st.session_state.auto_running = True
-            # ensure old capture is released before starting
-            try:
+        st.write("---")
+        st.subheader("🔁 Auto Capture (OpenCV single preview)")
+        st.caption("This opens the webcam once and updates a single live preview. Use Stop to end.")
+
+        interval = st.number_input("Minimum analysis interval (seconds):", min_value=0.5, max_value=5.0, value=1.5, step=0.5, format="%.1f")
+        batch_size = st.number_input("Frames per analysis batch (1 = analyze every frame):", min_value=1, max_value=32, value=1, step=1)
+        adaptive = st.checkbox("Adaptive analysis rate", value=True,
+                               help="Skip unchanged frames, analyze faster while the emotion changes and slower while it is steady. "
+                                    "The interval above becomes the fastest rate.")
+        cpu_budget = st.slider("CPU budget per session (share of one core)", 0.05, 1.0, 0.5, 0.05, disabled=not adaptive)
+        start_col, stop_col = st.columns(2)
+        with start_col:
+            if st.button("▶️ Start Auto Capture"):
+                # start camera
+                st.session_state.auto_running = True
+                # detach the previous consumer (the shared device itself stays open)
                 if st.session_state.cap is not None:
                     st.session_state.cap.release()
-            except Exception:
-                pass
-    with stop_col:
-        if st.button("⏹ Stop Auto Capture"):
-            st.session_state.auto_running = False
-
-    # placeholders for single live preview + status
-    live_placeholder = st.empty()
-    status_placeholder = st.empty()
-
-    # Auto-capture: open camera and update single placeholder
-    if st.session_state.auto_running:
-        status_placeholder.info("Opening camera... If nothing appears, close other apps using the camera.")
-        # open capture if not already
-        if st.session_state.cap is None:
-            # Try DirectShow (Windows) first
-            try:
-                cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-                if not cap.isOpened():
-                    cap = cv2.VideoCapture(0)  # fallback
-            except Exception:
-                cap = cv2.VideoCapture(0)
-            st.session_state.cap = cap
-
-        cap = st.session_state.cap
-        if not cap.isOpened():
-            status_placeholder.error("Cannot open camera. Close other apps using camera and click Start again.")
-            st.session_state.auto_running = False
-            # ensure release
-            try:
+        with stop_col:
+            if st.button("⏹ Stop Auto Capture"):
+                st.session_state.auto_running = False
+
+        # placeholders for single live preview + status
+        live_placeholder = st.empty()
+        status_placeholder = st.empty()
+
+        # Auto-capture: open camera and update single placeholder
+        if st.session_state.auto_running:
+            status_placeholder.info("Opening camera... If nothing appears, close other apps using the camera.")
+            # subscribe to the shared camera (no device re-open between runs)
+            if st.session_state.cap is None:
+                st.session_state.cap = load_camera().subscribe()
+
+            cap = st.session_state.cap
+            if not cap.isOpened():
+                status_placeholder.error(load_camera().error or "Cannot open camera. Close other apps using camera and click Start again.")
+                st.session_state.auto_running = False
                 cap.release()
-            except Exception:
-                pass
-            st.session_state.cap = None
-        else:
-            smoother = st.session_state.smoother
-            try:
-                # capture loop (will stop when auto_running set False)
-                while st.session_state.auto_running:
-                    ret, frame = cap.read()
-                    if not ret or frame is None:
-                        status_placeholder.error("Frame read failed (camera returned no frame).")
-                        break
-
-                    # convert to RGB for display + analysis
-                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-                    # analyze (safe)
-                    try:
-                        result = analyze_emotion(rgb)
-                        if isinstance(result, tuple):
-                            emo, conf = result
-                        else:
-                            emo, conf = result, 0.0
-                    except Exception as e:
-                        emo, conf = "Error", 0.0
-
-                    # update smoother and history
-                    try:
-                        smoother.update(emo, float(conf))
-                        stable = smoother.get_stable_emotion()
-                        if isinstance(stable, tuple):
-                            stable_label, stable_conf = stable
-                        else:
-                            stable_label, stable_conf = stable, 0.0
-                    except Exception:
-                        stable_label, stable_conf = emo, conf
-
-                    st.session_state.history.append((time.time(), emo, float(conf)))
-
-                    # update single preview and status
-                    live_placeholder.image(rgb, caption=f"Detected: {emo} ({conf}) — Stable: {stable_label} ({stable_conf})", use_column_width=True)
-                    status_placeholder.info(f"Auto capture running — stable: {stable_label} ({stable_conf})")
-
-                    # control rate
-                    time.sleep(float(interval))
-
-            finally:
-                # release resources on stop/exception
+                st.session_state.cap = None
+            else:
+                smoother = st.session_state.smoother
+                # frame-queue mode: frames are analyzed together once batch_size are waiting
+                # the pool does full-frame detection; the tracked ROI path stays in-process
+                tracker = st.session_state.tracker if pool is None else None
+                session_id = st.session_state.session_id
+                if tracker is not None:
+                    tracker.reset()
+                multi_tracker = st.session_state.multi_tracker if multi_face else None
+                if multi_tracker is not None:
+                    multi_tracker.reset()
+                face_smoothers = st.session_state.face_smoothers
+                # with the inference server, batching happens there (across all sessions);
+                # in multi-face mode each frame already is one batch (all of its faces)
+                queue = (FrameQueue(batch_size=batch_size, tracker=tracker, with_probs=True, session=session_id)
+                         if batch_size > 1 and not remote and not multi_face else None)
+
+                def handle(ts, frame):
+                    """
+                    Runs on the inference worker thread — never touches Streamlit. frame is a BGR frames.Frame.
+                    Returns [(ts, emotion, confidence, probs), ...]; probs feed the smoother and the timeline.
+                    Multi-face mode returns one (ts, emotion, confidence, probs, face_id) per face.
+                    """
+                    if recorder is not None:
+                        recorder.add_frame(ts, frame)
+                    if multi_tracker is not None:
+                        results = [(ts, r.label, r.confidence, r.probs, r.face_id)
+                                   for r in analyze_faces(frame, tracker=multi_tracker)]
+                    elif queue is not None:
+                        results = queue.push(frame, tag=ts)
+                    else:
+                        result = analyze_emotion_result(frame, tracker=tracker, session=session_id)
+                        results = [(ts, result.label, result.confidence, result.probs)]
+                    if recorder is not None:
+                        for r in results:
+                            recorder.add_result(*r[:3])
+                    return results
+
+                # capture + inference run in background threads; this loop only renders
+                scheduler = AdaptiveScheduler(min_interval=float(interval), max_interval=max(3.0, float(interval)),
+                                              cpu_budget=float(cpu_budget)) if adaptive else None
+                pipeline = InferencePipeline(cap, handle, min_interval=float(interval), scheduler=scheduler).start()
+                emo, conf = "Waiting", 0.0
+                stable_label, stable_conf = "No Data", 0.0
+                last_panel = 0.0
+                preview = PreviewView(live_placeholder, width=preview_width, quality=preview_quality)
+                status = Slot(status_placeholder)
                 try:
+                    # render loop (will stop when auto_running set False)
+                    while st.session_state.auto_running:
+                        if pipeline.error:
+                            status_placeholder.error(pipeline.error)
+                            break
+
+                        # update smoother and history with any new results
+                        results = pipeline.drain()
+                        for ts, emo, conf, *extra in results:
+                            probs = extra[0] if extra else None
+                            smoother.update(emo, float(conf), probs=probs)
+                            if len(extra) > 1 and extra[1] is not None:
+                                face_smoothers.update(extra[1], emo, float(conf), probs=probs, ts=ts)
+                            st.session_state.history.append(ts, emo, float(conf), probs=probs)
+                        if results:
+                            try:
+                                stable = smoother.get_stable_emotion()
+                                if isinstance(stable, tuple):
+                                    stable_label, stable_conf = stable
+                                else:
+                                    stable_label, stable_conf = stable, 0.0
+                            except Exception:
+                                stable_label, stable_conf = emo, conf
+                            history_view.update()
+                            render_feedback()
+
+                        # update single preview and status
+                        with METRICS.span("render"):
+                            latest = pipeline.latest_frame()
+                            if latest is not None:
+                                preview.show(latest[0], latest[2], caption=f"Detected: {emo} ({conf}) — Stable: {stable_label} ({stable_conf})")
+                            stats = pipeline.stats()
+                            pacing = (f", every {stats['scheduler']['interval_s']}s, skipped {stats['skipped']} unchanged"
+                                      if "scheduler" in stats else "")
+                            status.paint("info", f"Auto capture running — stable: {stable_label} ({stable_conf}) — "
+                                         f"inference {stats['last_latency_s']}s{pacing}, dropped {stats['dropped']} stale frames")
+                        if show_perf and time.time() - last_panel >= 1.0:
+                            render_perf_panel(perf_placeholder)
+                            last_panel = time.time()
+
+                        # display rate only; capture and inference run at their own pace
+                        time.sleep(1.0 / DISPLAY_FPS)
+
+                finally:
+                    # release resources on stop/exception (detaches this consumer only)
+                    pipeline.stop()
                     cap.release()
-                except Exception:
-                    pass
-                st.session_state.cap = None
-                st.session_state.auto_running = False
-                status_placeholder.info("Auto capture stopped. Click Start to run again.")
+                    st.session_state.cap = None
+                    st.session_state.auto_running = False
+                    status_placeholder.info("Auto capture stopped. Click Start to run again.")
+
+        # recorded answers: decoded as a stream, sampled, analyzed in batches, shown as they arrive
+        st.write("---")
+        st.subheader("📼 Recorded Answer (video file)")
+        video_file = st.file_uploader("Upload a recorded answer", type=list(VIDEO_TYPES))
+        video_rate = st.slider("Analyses per second of video", 0.5, 10.0, 2.0, 0.5)
+        if video_file is not None and st.button("Analyze Video"):
+            st.session_state.video_summary = analyze_video(video_file, video_rate)
+        summary = st.session_state.get("video_summary")
+        if summary:
+            st.success(f"Video: dominant emotion {summary['dominant']} — {summary['analyzed']} results over "
+                       f"{summary['video_s']}s of video")
+
+# paint the history / feedback views for this run (single capture, or after auto capture stopped)
+if emotion_on:
+    history_view.update()
+    render_feedback()
 
 # -----------------------
-# Right column: history, chart, feedback, speech
+# Right column: speech
 # -----------------------
 with col_right:
-    st.header("📊 Emotion History & Feedback")
-
-    # Show last N history
-    hist = list(st.session_state.history)
-    if hist:
-        # show last 6 entries
-        recent = hist[-6:]
-        rows = []
-        for ts, emo, conf in reversed(recent):
-            rows.append(f"{time.strftime('%H:%M:%S', time.localtime(ts))} — {emo} ({conf})")
-        st.write("Recent detections:")
-        for r in rows:
-            st.write("- " + r)
-
-        # Show tiny chart of confidences for last entries
-        times = [i for i in range(len(hist))]
-        confidences = [h[2] for h in hist]
-        # convert confidences to numeric (safe)
-        try:
-            confidences_num = [float(c) for c in confidences]
-        except Exception:
-            confidences_num = [0.0 for _ in confidences]
-
-        st.line_chart({"confidence": confidences_num})
-    else:
-        st.info("No detections yet — capture a frame or start auto-capture.")
-
     st.write("---")
-    st.subheader("💡 Feedback")
-    # Use last stable emotion for feedback
-    stable = st.session_state.smoother.get_stable_emotion()
-    if isinstance(stable, tuple):
-        label, conf_avg = stable
-        st.write(f"**Stable emotion:** {label} — avg confidence {conf_avg}")
-        st.info(short_feedback(label))
+    st.subheader("🎙 Speech Sentiment")
+    if not speech_on:
+        st.info("Speech sentiment is off (sidebar).")
     else:
-        st.write(f"**Stable emotion:** {stable}")
-        st.info("Perform a few captures to get feedback.")
+        if st.button("Record & Analyze Speech"):
+            partial_placeholder = st.empty()
+            with st.spinner("Listening for 5 seconds..."):
+                # live partial transcript while speaking (offline streaming ASR backend)
+                partial = {"text": "", "mood": ""}
 
-    st.write("---")
-    st.subheader("🎙 Speech Sentiment")
-    if st.button("Record & Analyze Speech"):
-        with st.spinner("Listening for 5 seconds..."):
-            text, sentiment = record_and_analyze()
-        if text:
-            st.success(f"🗣 You said: {text}")
-            st.info(f"💬 Sentiment: *{sentiment}*")
-        else:
-            st.error(sentiment)
+                def show_partial(text=None, mood=None):
+                    partial["text"] = text or partial["text"]
+                    partial["mood"] = mood or partial["mood"]
+                    partial_placeholder.caption(f"… {partial['text']}  ({partial['mood']})")
+
+                text, sentiment = stream_and_analyze(5, on_partial=lambda t: show_partial(text=t),
+                                                     on_mood=lambda m: show_partial(mood=m))
+            partial_placeholder.empty()
+            if text and recorder is not None:
+                recorder.add_transcript(text, sentiment)
+            if text:
+                st.success(f"🗣 You said: {text}")
+                st.info(f"💬 Sentiment: *{sentiment}*")
+            else:
+                st.error(sentiment)
+
+        # long answers: the microphone stays open and calibrated; utterances are
+        # transcribed while the candidate keeps talking
+        st.caption("Or answer at any length — utterances are transcribed as you speak.")
+        ans_start, ans_stop = st.columns(2)
+        with ans_start:
+            if st.button("🎙 Start Answer"):
+                audio_service = load_audio_service()
+                if audio_service.error:
+                    st.error(audio_service.error)
+                else:
+                    audio_service.begin_answer(on_segment=recorder.add_audio if recorder is not None else None)
+                    st.session_state.answering = True
+        with ans_stop:
+            if st.button("⏹ Finish Answer") and st.session_state.get("answering"):
+                st.session_state.answering = False
+                with st.spinner("Transcribing last utterance..."):
+                    text, sentiment = summarize_answer(load_audio_service().end_answer())
+                if text and recorder is not None:
+                    recorder.add_transcript(text, sentiment)
+                if text:
+                    st.success(f"🗣 You said: {text}")
+                    st.info(f"💬 Sentiment: *{sentiment}*")
+                else:
+                    st.error(sentiment)
+        if st.session_state.get("answering"):
+            st.info("Listening... click Finish Answer when you're done.")
+
+if show_perf:
+    render_perf_panel(perf_placeholder)
+
+# deferred warm-up: everything above is already on screen while the models load
+if emotion_on:
+    model_stats = load_models().stats if not remote else {"warm": "remote (inference server)"}
+    models_placeholder.caption(f"Models warm: {model_stats.get('warm')} — warm-up {model_stats.get('warm_s')}s, RSS {model_stats.get('rss_mb_after')} MB")
 
 # -----------------------
 # Footer
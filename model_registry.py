@@ -0,0 +1,182 @@
+# model_registry.py — process-wide warm face detector + emotion model
+#
+# EMOTION_BACKEND picks the emotion classifier:
+#   keras      DeepFace's Keras CNN (default; needs deepface + tensorflow)
+#   onnx       the same CNN exported to ONNX, run by onnxruntime (see onnx_backend.py)
+#   onnx-int8  the int8 dynamically-quantized export
+# The onnx backends never import DeepFace / TensorFlow; with keras, DeepFace (and TensorFlow) is
+# imported on first use, not when this module is imported.
+import os
+import threading
+import time
+import traceback
+
+import cv2
+import numpy as np
+
+BACKENDS = ("keras", "onnx", "onnx-int8")
+EMOTION_BACKEND = os.environ.get("EMOTION_BACKEND", "keras")
+
+_deepface = None            # DeepFace module once imported, False if the import failed
+_deepface_version = None
+_deepface_lock = threading.Lock()
+
+
+def deepface_module():
+    """deepface.DeepFace, imported on first call (this is what loads TensorFlow); None if unavailable."""
+    global _deepface, _deepface_version
+    if _deepface is None:
+        with _deepface_lock:
+            if _deepface is None:
+                try:
+                    import deepface
+                    from deepface import DeepFace
+                    _deepface = DeepFace
+                    _deepface_version = getattr(deepface, "__version__", "unknown")
+                except Exception as e:
+                    _deepface = False
+                    print("DeepFace import failed:", e)
+    return _deepface or None
+
+
+def deepface_available():
+    return deepface_module() is not None
+
+
+def __getattr__(name):
+    # DEEPFACE_AVAILABLE / DEEPFACE_VERSION stay importable, but only cost the import when asked for
+    if name == "DEEPFACE_AVAILABLE":
+        return deepface_available()
+    if name == "DEEPFACE_VERSION":
+        deepface_module()
+        return _deepface_version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+FACE_SIZE = 48  # emotion CNN input is 48x48 grayscale
+
+
+def _rss_mb():
+    """Current process memory in MB (psutil if installed, else peak RSS from resource), or None."""
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except Exception:
+        pass
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KB on Linux
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """Holds the Haar face detector and the emotion model, built once and shared by all callers."""
+    def __init__(self, backend=None):
+        self.backend = backend or EMOTION_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown emotion backend: {self.backend}")
+        self._lock = threading.Lock()
+        self._face_cascade = None
+        self._emotion_model = None
+        self.stats = {}
+
+    @property
+    def model_id(self):
+        """Identifies the emotion model in results (e.g. "deepface-0.0.93/emotion", "onnx-int8/emotion.int8.onnx")."""
+        if self.backend == "keras":
+            deepface_module()
+            return f"deepface-{_deepface_version}/emotion"
+        import onnx_backend
+        return f"{self.backend}/{os.path.basename(onnx_backend.model_path(self.backend == 'onnx-int8'))}"
+
+    def available(self):
+        """Can this backend classify? (DeepFace importable, or onnxruntime + the exported model file.)"""
+        if self.backend == "keras":
+            return deepface_available()
+        import onnx_backend
+        return onnx_backend.available(int8=self.backend == "onnx-int8")
+
+    def face_cascade(self):
+        """Haar cascade used by DeepFace's "opencv" detector backend."""
+        if self._face_cascade is None:
+            with self._lock:
+                if self._face_cascade is None:
+                    self._face_cascade = cv2.CascadeClassifier(
+                        cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        return self._face_cascade
+
+    def emotion_model(self):
+        """Emotion CNN: model(batch (N, 48, 48, 1) float32, training=False) -> (N, 7) probabilities."""
+        if self._emotion_model is None:
+            with self._lock:
+                if self._emotion_model is None and self.backend != "keras":
+                    import onnx_backend
+                    self._emotion_model = onnx_backend.OnnxEmotionModel(int8=self.backend == "onnx-int8")
+                elif self._emotion_model is None:
+                    DeepFace = deepface_module()
+                    try:
+                        model = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+                    except TypeError:
+                        # older DeepFace: build_model(model_name)
+                        model = DeepFace.build_model("Emotion")
+                    self._emotion_model = getattr(model, "model", model)
+        return self._emotion_model
+
+    def warm(self):
+        """Load both models and run one dummy inference through each; fills self.stats."""
+        if self.stats.get("warm"):
+            return self.stats
+        rss_before = _rss_mb()
+        t0 = time.perf_counter()
+        try:
+            self.face_cascade().detectMultiScale(np.zeros((240, 320), dtype=np.uint8))
+            if self.available():
+                t_load = time.perf_counter()
+                model = self.emotion_model()
+                self.stats["model_load_s"] = round(time.perf_counter() - t_load, 3)
+                model(np.zeros((1, FACE_SIZE, FACE_SIZE, 1), dtype=np.float32), training=False)
+                if self.backend == "keras":
+                    # also warm DeepFace's own model cache used by analyze_emotion()
+                    deepface_module().analyze(np.zeros((240, 320, 3), dtype=np.uint8), actions=["emotion"],
+                                              enforce_detection=False, detector_backend="opencv")
+            self.stats["warm"] = True
+        except Exception as e:
+            print("Model warm-up error:", e)
+            traceback.print_exc()
+            self.stats["warm"] = False
+        self.stats["warm_s"] = round(time.perf_counter() - t0, 3)
+        self.stats["rss_mb_before"] = rss_before
+        self.stats["rss_mb_after"] = _rss_mb()
+        self.stats["deepface"] = bool(_deepface)
+        self.stats["backend"] = self.backend
+        return self.stats
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide ModelRegistry (created on first use)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+def set_backend(backend):
+    """Swap the process-wide registry for one using another emotion backend (keras / onnx / onnx-int8)."""
+    global _registry
+    with _registry_lock:
+        _registry = ModelRegistry(backend)
+    return _registry
+
+
+def warm_models():
+    """Preload + warm the shared registry; returns it. Wrap in st.cache_resource in Streamlit apps."""
+    registry = get_registry()
+    registry.warm()
+    return registry
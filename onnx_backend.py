@@ -0,0 +1,168 @@
+# onnx_backend.py — the DeepFace emotion CNN exported to ONNX and run with onnxruntime on CPU
+#
+#   python onnx_backend.py export [--int8]             Keras model -> models/emotion.onnx (+ emotion.int8.onnx)
+#   python onnx_backend.py parity --images refs/ [--int8]
+#   EMOTION_BACKEND=onnx-int8 streamlit run main_polished.py
+#
+# Export needs deepface + tensorflow + tf2onnx (once, on any machine); serving only needs onnxruntime.
+# parity compares the ONNX model with the Keras model on the same face crops of a reference image set
+# and exits non-zero when they disagree beyond the tolerances.
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except Exception:
+    ONNXRUNTIME_AVAILABLE = False
+
+DEFAULT_PATH = os.path.join("models", "emotion.onnx")
+FACE_SIZE = 48
+
+
+def model_path(int8=False):
+    """EMOTION_ONNX_PATH (default models/emotion.onnx); the int8 model sits next to it as *.int8.onnx."""
+    path = os.environ.get("EMOTION_ONNX_PATH", DEFAULT_PATH)
+    return os.path.splitext(path)[0] + ".int8.onnx" if int8 else path
+
+
+def available(int8=False):
+    return ONNXRUNTIME_AVAILABLE and os.path.exists(model_path(int8))
+
+
+class OnnxEmotionModel:
+    """Drop-in for the Keras model in model_registry: model(batch (N, 48, 48, 1), training=False) -> (N, 7)."""
+    def __init__(self, path=None, int8=False, threads=None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+        self.path = path or model_path(int8)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = threads or int(os.environ.get("ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch, training=False):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def _keras_model():
+    from model_registry import ModelRegistry
+    registry = ModelRegistry("keras")
+    if not registry.available():
+        raise RuntimeError("the keras backend (deepface + tensorflow) is needed here; unset EMOTION_BACKEND")
+    return registry.emotion_model()
+
+
+def export_onnx(path=None, opset=13):
+    """Convert DeepFace's Keras emotion CNN to ONNX (dynamic batch size); returns the path."""
+    import tensorflow as tf
+    import tf2onnx
+
+    path = path or model_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    spec = (tf.TensorSpec((None, FACE_SIZE, FACE_SIZE, 1), tf.float32, name="face"),)
+    tf2onnx.convert.from_keras(_keras_model(), input_signature=spec, opset=opset, output_path=path)
+    return path
+
+
+def quantize_int8(src=None, dst=None):
+    """Dynamic int8 quantization of the exported model (weights int8, activations quantized at run time)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src = src or model_path()
+    dst = dst or model_path(int8=True)
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    return dst
+
+
+def _reference_crops(image_dir=None, random_n=0, seed=0):
+    """(N, 48, 48, 1) face crops prepared exactly like analyze_emotion's classify path."""
+    import cv2
+    from emotion_analysis import _face_crop
+    from frames import Frame
+
+    crops = []
+    if image_dir:
+        for name in sorted(os.listdir(image_dir)):
+            img = cv2.imread(os.path.join(image_dir, name))
+            if img is None:
+                continue
+            out = np.empty((FACE_SIZE, FACE_SIZE), dtype=np.float32)
+            _face_crop(Frame(img, "BGR"), out)
+            crops.append(out)
+    rng = np.random.default_rng(seed)
+    crops.extend(rng.random((random_n, FACE_SIZE, FACE_SIZE), dtype=np.float32))
+    return np.stack(crops)[..., None] if crops else np.empty((0, FACE_SIZE, FACE_SIZE, 1), np.float32)
+
+
+def _latency_ms(model, batch, repeat=20):
+    model(batch[:1], training=False)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        model(batch, training=False)
+    return round(1000 * (time.perf_counter() - t0) / repeat, 3)
+
+
+def parity_check(image_dir=None, int8=False, random_n=0, max_abs=None, min_agreement=None):
+    """
+    Compare ONNX and Keras probabilities on the same crops. Default tolerances: fp32 max |diff| 1e-4 and
+    100% top-1 agreement; int8 max |diff| 0.1 and 95% top-1 agreement. Returns a report dict with "ok".
+    """
+    max_abs = max_abs if max_abs is not None else (0.1 if int8 else 1e-4)
+    min_agreement = min_agreement if min_agreement is not None else (0.95 if int8 else 1.0)
+    crops = _reference_crops(image_dir, random_n)
+    if not len(crops):
+        raise ValueError("no reference images (use --images DIR and/or --random N)")
+    keras_model = _keras_model()
+    onnx_model = OnnxEmotionModel(int8=int8)
+    expected = np.asarray(keras_model(crops, training=False), dtype=np.float32)
+    got = onnx_model(crops)
+    diff = np.abs(expected - got)
+    agreement = float(np.mean(expected.argmax(axis=1) == got.argmax(axis=1)))
+    report = {
+        "model": onnx_model.path,
+        "samples": int(len(crops)),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "top1_agreement": round(agreement, 4),
+        "latency_ms": {"keras": _latency_ms(keras_model, crops[:16]), "onnx": _latency_ms(onnx_model, crops[:16])},
+        "tolerance": {"max_abs_diff": max_abs, "top1_agreement": min_agreement},
+    }
+    report["ok"] = report["max_abs_diff"] <= max_abs and agreement >= min_agreement
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export / quantize / check the ONNX emotion model.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="export the Keras model to ONNX")
+    p_export.add_argument("--int8", action="store_true", help="also write the int8-quantized model")
+    p_export.add_argument("--opset", type=int, default=13)
+    p_parity = sub.add_parser("parity", help="compare ONNX with Keras on reference images")
+    p_parity.add_argument("--images", help="folder of reference images (faces)")
+    p_parity.add_argument("--random", type=int, default=0, help="add N random 48x48 crops")
+    p_parity.add_argument("--int8", action="store_true", help="check the int8 model")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        path = export_onnx(opset=args.opset)
+        print("Wrote", path)
+        if args.int8:
+            print("Wrote", quantize_int8(path))
+        return 0
+    report = parity_check(args.images, int8=args.int8, random_n=args.random)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
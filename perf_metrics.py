@@ -0,0 +1,199 @@
+# perf_metrics.py — low-overhead timing spans, counters and histograms for the hot path
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# latency buckets (seconds): 0.25 ms .. ~16 s, doubling
+BUCKETS = tuple(0.00025 * 2 ** i for i in range(17))
+RATE_WINDOW = 5.0
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated inside a bucket."""
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                lo = BUCKETS[i - 1] if i > 0 else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1] * 2
+                return lo + (hi - lo) * (target - seen) / c
+            seen += c
+        return BUCKETS[-1]
+
+
+class Counter:
+    """Monotonic counter that also remembers recent increments for a per-second rate."""
+    __slots__ = ("value", "recent")
+
+    def __init__(self):
+        self.value = 0
+        self.recent = deque(maxlen=1024)
+
+    def inc(self, n=1):
+        self.value += n
+        self.recent.append((time.monotonic(), n))
+
+    def rate(self, window=RATE_WINDOW):
+        now = time.monotonic()
+        return sum(n for t, n in self.recent if now - t <= window) / window
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "t0", "into")
+
+    def __init__(self, metrics, name, into=None):
+        self.metrics = metrics
+        self.name = name
+        self.into = into
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        self.metrics.observe(self.name, elapsed)
+        if self.into is not None:
+            self.into[self.name] = elapsed
+        return False
+
+
+class Metrics:
+    """Process-wide registry of counters, gauges and stage-latency histograms."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def span(self, name, into=None):
+        """
+        with METRICS.span("detect"): ...  — records the block's duration under `name`
+        (and also as into[name] when a per-call timings dict is given).
+        """
+        return _Span(self, name, into)
+
+    def observe(self, name, seconds):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, Histogram())
+        hist.observe(seconds)
+
+    def inc(self, name, n=1):
+        counter = self.counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self.counters.setdefault(name, Counter())
+        counter.inc(n)
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Plain-dict view: counters (+ per-second rate), gauges, p50/p95/p99 per stage in ms."""
+        return {
+            "counters": {k: {"value": c.value, "per_s": round(c.rate(), 2)} for k, c in list(self.counters.items())},
+            "gauges": dict(self.gauges),
+            "stages": {k: {"count": h.count,
+                           "mean_ms": round(1000 * h.total / h.count, 3) if h.count else 0.0,
+                           "p50_ms": round(1000 * h.quantile(0.50), 3),
+                           "p95_ms": round(1000 * h.quantile(0.95), 3),
+                           "p99_ms": round(1000 * h.quantile(0.99), 3)}
+                       for k, h in list(self.histograms.items())},
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix="trainer"):
+        lines = []
+        for name, c in list(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {c.value}")
+        for name, value in list(self.gauges.items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        lines.append(f"# TYPE {prefix}_stage_seconds histogram")
+        for name, h in list(self.histograms.items()):
+            cumulative = 0
+            for bound, c in zip(BUCKETS, h.counts):
+                cumulative += c
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {h.total}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def serve_metrics(port=9108, host="127.0.0.1", metrics=METRICS):
+    """Expose /metrics (Prometheus text) and /metrics.json on a daemon thread; returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, ctype = metrics.to_json(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, ctype = metrics.to_prometheus(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def render_perf_panel(container=None, metrics=METRICS):
+    """Draw fps / queue depth / drops / p50-p95 stage latency into a Streamlit container (default: sidebar)."""
+    import streamlit as st
+    container = container or st.sidebar
+    snap = metrics.snapshot()
+    counters, gauges = snap["counters"], snap["gauges"]
+    lines = [
+        f"**Capture fps:** {counters.get('frames_captured', {}).get('per_s', 0.0)}",
+        f"**Inference fps:** {counters.get('frames_analyzed', {}).get('per_s', 0.0)}",
+        f"**Queue depth:** {gauges.get('queue_depth', 0)}",
+        f"**Dropped frames:** {counters.get('frames_dropped', {}).get('value', 0)}",
+    ]
+    if "frame_cache_hit_rate" in gauges:
+        lines.append(f"**Frame cache hit rate:** {gauges['frame_cache_hit_rate']:.0%} "
+                     f"({counters.get('frame_cache_hits', {}).get('value', 0)} hits)")
+    for stage, s in snap["stages"].items():
+        lines.append(f"`{stage}` p50 {s['p50_ms']} ms · p95 {s['p95_ms']} ms ({s['count']})")
+    container.markdown("  \n".join(lines))
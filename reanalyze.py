@@ -0,0 +1,155 @@
+# reanalyze.py — re-run emotion + speech analysis over recorded sessions on every core
+#
+#   python reanalyze.py sessions/                    # every session under sessions/
+#   python reanalyze.py sessions/session-20240101-101500-3f2a9c1e --workers 8 --no-speech
+#
+# Frames and audio are read lazily in chunks by the worker processes themselves (only
+# paths and indices cross the process boundary), with a bounded number of tasks in flight,
+# so hour-long recordings never have to fit in memory. Results go to <session>/reanalysis/.
+import argparse
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from session_store import ColumnWriter, SessionReader, label_code, list_sessions, LABELS
+
+
+def _init_worker():
+    from model_registry import warm_models
+    warm_models()
+
+
+def _frames_task(session_path, indices):
+    """Analyze one run of stored frames -> (indices, emotion codes, confidences)."""
+    import cv2
+    from emotion_analysis import analyze_emotion
+
+    reader = SessionReader(session_path)
+    cap = None
+    if reader.meta.get("frame_mode") == "video":
+        cap = cv2.VideoCapture(os.path.join(session_path, "frames.avi"))
+    codes = np.full(len(indices), label_code("Other"), dtype=np.uint8)
+    confs = np.zeros(len(indices), dtype=np.float32)
+    try:
+        for j, index in enumerate(indices):
+            frame = reader.read_frame(index, cap)
+            if frame is None:
+                continue
+            result = analyze_emotion(frame)
+            emo, conf = result if isinstance(result, tuple) else (result, 0.0)
+            codes[j] = label_code(emo)
+            confs[j] = float(conf)
+    finally:
+        if cap is not None:
+            cap.release()
+    return indices, codes, confs
+
+
+def _speech_task(session_path, start, end, offset, frames, backend=None):
+    """Transcribe one stored utterance -> (start, text, mood) or None."""
+    from audio_capture import Segment
+    from speech_analysis import analyze_segment
+
+    pcm, rate, width = SessionReader(session_path).read_audio(offset, frames)
+    result = analyze_segment(Segment(start, end, pcm, rate, width), backend=backend)
+    return None if result is None else (start, result[0], result[1])
+
+
+def _ordered(executor, tasks, max_in_flight):
+    """executor.submit each (fn, *args) with at most max_in_flight pending; yield results in task order."""
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(*task))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def reanalyze_session(executor, path, workers, chunk=64, frames=True, speech=True, backend=None):
+    reader = SessionReader(path)
+    out_dir = os.path.join(path, "reanalysis")
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.time()
+    summary = {"session": reader.session_id, "path": path}
+
+    if frames:
+        def frame_tasks(ts_by_index):
+            for ts, index in reader.iter_frame_index():
+                for i in range(0, len(index), chunk):
+                    ts_by_index.append(ts[i:i + chunk])
+                    yield _frames_task, path, index[i:i + chunk]
+
+        for old in os.listdir(out_dir):
+            if old.startswith("results-") and old.endswith(".npz"):
+                os.remove(os.path.join(out_dir, old))
+        cols = ColumnWriter(out_dir, "results", {"ts": np.float64, "emotion": np.uint8, "confidence": np.float32})
+        counts = np.zeros(len(LABELS), dtype=np.int64)
+        conf_sum = 0.0
+        ts_queue = deque()
+        for indices, codes, confs in _ordered(executor, frame_tasks(ts_queue), 2 * workers):
+            for t, code, conf in zip(ts_queue.popleft(), codes, confs):
+                cols.append(ts=t, emotion=code, confidence=conf)
+            counts += np.bincount(codes, minlength=len(LABELS))
+            conf_sum += float(confs.sum())
+        cols.flush()
+        n = int(counts.sum())
+        summary["frames"] = n
+        summary["emotions"] = {LABELS[i]: int(c) for i, c in enumerate(counts) if c}
+        summary["dominant"] = LABELS[int(counts[:-1].argmax())] if counts[:-1].any() else None
+        summary["mean_confidence"] = round(conf_sum / n, 3) if n else 0.0
+
+    if speech and os.path.exists(os.path.join(path, "audio.wav")):
+        from speech_analysis import summarize_answer
+
+        tasks = ((_speech_task, path) + u + (backend,) for u in reader.iter_utterances())
+        results = []
+        with open(os.path.join(out_dir, "transcripts.jsonl"), "w", encoding="utf-8") as f:
+            for r in _ordered(executor, tasks, 2 * workers):
+                if r is not None:
+                    f.write(json.dumps({"ts": r[0], "text": r[1], "mood": r[2]}) + "\n")
+                    results.append(r[1:])
+        text, mood = summarize_answer(results)
+        summary["utterances"] = len(results)
+        summary["moods"] = dict(Counter(m for _, m in results))
+        summary["answer_mood"] = mood
+
+    summary["elapsed_s"] = round(time.time() - t0, 2)
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run emotion and speech analysis over recorded sessions.")
+    parser.add_argument("paths", nargs="+", help="session directories or folders containing sessions")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=64, help="frames per worker task")
+    parser.add_argument("--no-frames", action="store_true", help="skip emotion re-analysis")
+    parser.add_argument("--no-speech", action="store_true", help="skip speech re-analysis")
+    parser.add_argument("--backend", help="ASR backend (vosk|google), default: ASR_BACKEND / first available")
+    parser.add_argument("--out", help="also write all session summaries to this JSON file")
+    args = parser.parse_args(argv)
+
+    sessions = [s for p in args.paths for s in list_sessions(p)]
+    if not sessions:
+        parser.error("no recorded sessions found")
+    summaries = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as executor:
+        for path in sessions:
+            summary = reanalyze_session(executor, path, args.workers, chunk=args.chunk, frames=not args.no_frames,
+                                        speech=not args.no_speech, backend=args.backend)
+            print(json.dumps(summary))
+            summaries.append(summary)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+    return summaries
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# sentiment.py — shared, cached, vectorized polarity scoring (TextBlob/pattern lexicon)
+#
+# Scores with the same lexicon and the main rules of TextBlob's PatternAnalyzer
+# (intensifying adverbs, "not good" = -0.5 * good, also across short words, each "!" = 1.25 *
+# the previous assessment, emoticons and "(!)" as assessments of their own, contractions split
+# as "was n ' t" and never negating, averaging over assessments),
+# but for many texts at once with NumPy and without building TextBlob objects.
+# Not reproduced, so scores differ there: a modifier carried across short words or marks
+# ("really is a good", "very! good", "really :( bad"), a modifier followed by a negation
+# ("really not good") and TextBlob's punctuation splitting inside words.
+# `python sentiment.py` checks parity on fixed cases (and against TextBlob when installed).
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# TextBlob also lists "n't", but its tokenizer splits "wasn't" into "was n ' t", so it never negates
+NEGATIONS = ("no", "not", "never")
+# TextBlob's EMOTICONS (lower-cased, as it compares them; all-letter ones like "xd" never match there)
+EMOTICONS = {
+    **dict.fromkeys(("<3", "♥"), 1.0),
+    **dict.fromkeys((">:d", ":-d", ":d", "=-d", "=d", "x-d", "8-d"), 1.0),
+    **dict.fromkeys((">:p", ":-p", ":p", ":-b", ":b", ":c)", ":o)", ":^)"), 0.75),
+    **dict.fromkeys((">:)", ":-)", ":)", "=)", "=]", ":]", ":}", ":>", ":3", "8)", "8-)"), 0.5),
+    **dict.fromkeys((">;]", ";-)", ";)", ";-]", ";]", ";d", ";^)", "*-)", "*)"), 0.25),
+    **dict.fromkeys((">:o", ":-o", ":o", "o_o", "o.o", "°o°"), 0.05),
+    **dict.fromkeys((">:/", ":-/", ":/", ":\\", ">:\\", ":-.", ":-s", ":s", ">.>"), -0.25),
+    **dict.fromkeys((">:[", ":-(", ":(", "=(", ":-[", ":[", ":{", ":-<", ":c", ":-c", "=/"), -0.75),
+    **dict.fromkeys((":'(", ":'''(", ";'("), -1.0),
+    "(!)": 0.0,     # sarcasm mark: an assessment of 0 that pulls the average down
+}
+_EMOTICON_RE = "|".join(re.escape(e) for e in sorted(EMOTICONS, key=len, reverse=True))
+_TOKEN_RE = re.compile(r"\(\s*!\s*\)|(?:" + _EMOTICON_RE + r")(?![a-z0-9])|!|[a-z]+(?=n't)|n(?='t)|[a-z]+(?:-[a-z]+)*")
+_SARCASM_RE = re.compile(r"\(\s*!\s*\)")
+_SEP = -2       # id between texts so context never crosses a boundary
+_UNKNOWN = -1
+_CONTEXT = 8    # tokens of look-back kept by the incremental scorer
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def tokenize(text):
+    return [_SARCASM_RE.sub("(!)", t) for t in _TOKEN_RE.findall(text.lower())]
+
+
+class Lexicon:
+    """word -> index, with parallel polarity / intensity / is-modifier arrays."""
+    def __init__(self, entries):
+        words = sorted(entries)
+        self.index = {w: i for i, w in enumerate(words)}
+        self.polarity = np.array([entries[w][0] for w in words], dtype=np.float64)
+        self.intensity = np.array([entries[w][1] for w in words], dtype=np.float64)
+        self.modifier = np.array([entries[w][2] for w in words], dtype=bool)
+        self.negation_ids = {self.index[w] for w in NEGATIONS if w in self.index}
+
+    @classmethod
+    def from_textblob(cls):
+        from textblob.en import sentiment as pattern_sentiment
+        entries = {}
+        for word, senses in pattern_sentiment.items():
+            p, _, i = senses[None]
+            entries[word] = (p, i, "RB" in senses)
+        return cls(entries)
+
+    def ids(self, tokens):
+        get = self.index.get
+        return [get(t, _UNKNOWN) for t in tokens]
+
+
+def _contributions(ids, neg, short, emo, bang, lex):
+    """
+    Per-token polarity contribution for a flat id array (texts separated by _SEP).
+    emo: emoticon polarity (NaN for other tokens); bang: "!" tokens.
+    Returns (values, mask): mask marks tokens that close an assessment; values are their polarity.
+    """
+    n = len(ids)
+    known = ids >= 0
+    is_emo = ~np.isnan(emo)
+    safe = np.where(known, ids, 0)
+    p = np.where(known, lex.polarity[safe], 0.0)
+    inten = np.where(known, lex.intensity[safe], 1.0)
+    mod = known & lex.modifier[safe]
+
+    prev_known = np.zeros(n, dtype=bool)
+    prev_mod = np.zeros(n, dtype=bool)
+    prev_known[1:], prev_mod[1:] = known[:-1], mod[:-1]
+    merged = known & prev_known & prev_mod           # "very good": good joins very's assessment
+    start = (known & ~merged) | is_emo               # an emoticon is an assessment of its own
+    next_merged = np.zeros(n, dtype=bool)
+    next_merged[:-1] = merged[1:]
+    last = (known & ~next_merged) | is_emo           # token that closes an assessment
+    assessed = known | is_emo
+
+    # negation before the assessment, also across short words and marks ("not a good", "not !! good"):
+    # the nearest earlier token that is not a short unknown one must be a negation
+    pos = np.arange(n)
+    decides = known | neg | ~short
+    prev = np.full(n, -1)
+    prev[1:] = np.maximum.accumulate(np.where(decides, pos, -1))[:-1]
+    negated_start = start & known & (prev >= 0) & neg[np.maximum(prev, 0)]
+    group = np.cumsum(start) - 1
+    group_negated = negated_start[start]
+    is_negated = np.zeros(n, dtype=bool)
+    is_negated[assessed] = group_negated[group[assessed]]
+
+    prev_i = np.ones(n)
+    prev_i[1:] = inten[:-1]
+    # a negated chain uses the inverted intensity ("not very good" is milder than "not good")
+    factor = np.where(is_negated, 1.0 / prev_i, prev_i)
+    values = np.where(merged, np.clip(p * factor, -1.0, 1.0), p)
+    values = np.where(is_emo, emo, values)
+    if bang.any():
+        # every "!" multiplies the latest assessment of its text by 1.25 (before negation, clipped)
+        latest = np.maximum.accumulate(np.where(start, pos, -1))
+        text_start = np.maximum.accumulate(np.where(ids == _SEP, pos, -1))
+        marks = np.bincount(group[bang & (latest > text_start)], minlength=int(start.sum()))
+        boost = np.zeros(n)
+        boost[last] = marks[group[last]]
+        values = np.where(boost > 0, np.clip(values * 1.25 ** boost, -1.0, 1.0), values)
+    values = np.where(is_negated, values * -0.5, values)
+    return values, last
+
+
+class SentimentService:
+    """Polarity in [-1, 1] for single texts, batches, or growing transcripts; LRU-cached by normalized text."""
+    def __init__(self, cache_size=4096, lexicon=None):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._lexicon = lexicon
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def lexicon(self):
+        if self._lexicon is None:
+            with self._lock:
+                if self._lexicon is None:
+                    self._lexicon = Lexicon.from_textblob()
+        return self._lexicon
+
+    def polarity(self, text):
+        return self.polarity_many([text])[0]
+
+    def polarity_many(self, texts):
+        """Score many texts in one vectorized pass; cached and duplicate texts are scored once."""
+        keys = [normalize(t or "") for t in texts]
+        out = {}
+        with self._lock:
+            for k in keys:
+                if k in self._cache:
+                    self._cache.move_to_end(k)
+                    out[k] = self._cache[k]
+                    self.hits += 1
+        missing = list(dict.fromkeys(k for k in keys if k not in out))
+        if missing:
+            self.misses += len(missing)
+            scores = self._score(missing)
+            with self._lock:
+                for k, s in zip(missing, scores):
+                    out[k] = s
+                    self._cache[k] = s
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return [out[k] for k in keys]
+
+    def _arrays(self, token_lists):
+        """Flat (ids, neg, short, emo, bang, owner) arrays of several token lists, _SEP after each."""
+        lex = self.lexicon
+        ids, neg, short, emo, bang, owner = [], [], [], [], [], []
+        nan = float("nan")
+        for t_idx, tokens in enumerate(token_lists):
+            ids.extend(lex.ids(tokens))
+            neg.extend(t in NEGATIONS for t in tokens)
+            short.extend(len(t) <= 1 for t in tokens)
+            emo.extend(EMOTICONS.get(t, nan) for t in tokens)
+            bang.extend(t == "!" for t in tokens)
+            owner.extend([t_idx] * len(tokens))
+            ids.append(_SEP)
+            neg.append(False)
+            short.append(False)
+            emo.append(nan)
+            bang.append(False)
+            owner.append(t_idx)
+        return (np.array(ids, dtype=np.int64), np.array(neg, dtype=bool), np.array(short, dtype=bool),
+                np.array(emo, dtype=np.float64), np.array(bang, dtype=bool), np.array(owner, dtype=np.int64))
+
+    def _score(self, texts):
+        ids, neg, short, emo, bang, owner = self._arrays([tokenize(t) for t in texts])
+        values, last = _contributions(ids, neg, short, emo, bang, self.lexicon)
+        sums = np.bincount(owner[last], weights=values[last], minlength=len(texts))
+        counts = np.bincount(owner[last], minlength=len(texts))
+        return [float(s / c) if c else 0.0 for s, c in zip(sums, counts)]
+
+    def incremental(self):
+        return IncrementalSentiment(self)
+
+
+class IncrementalSentiment:
+    """
+    Polarity of a growing transcript (e.g. partial ASR results). update(full_text) only tokenizes
+    and scores the words appended since the last call, plus a few words of look-back context.
+    """
+    def __init__(self, service):
+        self.service = service
+        self.text = ""
+        self.tokens = []
+        self.settled = []       # contribution (or None) of tokens that can no longer change
+        self._last_start = 0    # char offset where the last token starts
+        self.sum = 0.0
+        self.count = 0
+        self._pending = (0.0, 0)
+
+    def reset(self):
+        self.__init__(self.service)
+
+    def update(self, text):
+        if not text.startswith(self.text):
+            # transcript was revised (ASR rewrote earlier words): start over
+            self.reset()
+        if self.tokens:
+            # the last word may continue into the new text ("hap" -> "happy", "wasn" -> "was n"):
+            # re-tokenize from where it started, and reopen the word before it too
+            self.tokens.pop()
+            self._unsettle(max(0, len(self.tokens) - 1))
+        tail_from = self._last_start
+        self.text = text
+        for m in _TOKEN_RE.finditer(text.lower(), tail_from):
+            self.tokens.append(_SARCASM_RE.sub("(!)", m.group()))
+            self._last_start = m.start()
+        return self._rescore_tail()
+
+    def append(self, words):
+        return self.update(self.text + (" " if self.text else "") + words)
+
+    def _unsettle(self, k):
+        for c in self.settled[k:]:
+            if c is not None:
+                self.sum -= c
+                self.count -= 1
+        del self.settled[k:]
+
+    def _rescore_tail(self):
+        # a token's contribution depends on the token after it, so the last one stays open; so does
+        # the latest assessment, which a later "!" still boosts
+        start = len(self.settled)
+        lo = max(0, start - _CONTEXT)
+        ids, neg, short, emo, bang, _ = self.service._arrays([self.tokens[lo:]])
+        values, last = _contributions(ids, neg, short, emo, bang, self.service.lexicon)
+        values, last = values[:-1], last[:-1]   # drop the separator
+        settle = len(self.tokens) - 1 - lo
+        closing = np.flatnonzero(last[start - lo:settle])
+        if closing.size:
+            settle = start - lo + int(closing[-1])
+        for j in range(start - lo, settle):
+            c = float(values[j]) if last[j] else None
+            self.settled.append(c)
+            if c is not None:
+                self.sum += c
+                self.count += 1
+        tail = last[settle:]
+        self._pending = (float(values[settle:][tail].sum()), int(tail.sum()))
+        return self.polarity
+
+    @property
+    def polarity(self):
+        n = self.count + self._pending[1]
+        return (self.sum + self._pending[0]) / n if n else 0.0
+
+
+_service = None
+
+
+def get_service():
+    """Process-wide SentimentService shared by speech_analysis and feedback_generator."""
+    global _service
+    if _service is None:
+        _service = SentimentService()
+    return _service
+
+
+def polarity(text):
+    return get_service().polarity(text)
+
+
+def polarity_many(texts):
+    return get_service().polarity_many(texts)
+
+
+# (text, TextBlob 0.20 polarity) — fixed reference scores for the parity check
+PARITY_CASES = (
+    ("I love it", 0.5),
+    ("I love it!!!", 0.9765625),
+    ("not good", -0.35),
+    ("not very good", -0.2692),
+    ("very good :)", 0.705),
+    (":(", -0.75),
+    ("good! bad", 0.0875),
+    ("I am happy :) but sad!", 0.225),
+    ("great answer (!)", 0.4),
+    ("I don't like it", 0.0),
+    # contractions are split, never negated: "wasn't" -> "was n ' t"
+    ("it wasn't great", 0.8),
+    ("It wasn't a bad experience", -0.7),
+    ("I don't really know", 0.2),
+    ("didn't really enjoy", 0.4),
+    ("not good!", -0.4375),
+    ("I am not happy :( !!", -0.7),
+    ("I am very excited about this role!!", 0.7617),
+    ("Honestly, it was not a great experience :(", -0.1833),
+    ("We failed, but I learned a lot. Not bad!", -0.0313),
+)
+
+
+def parity_check(cases=PARITY_CASES, tol=1e-3, service=None):
+    """Compare polarity with PARITY_CASES (and with TextBlob itself when installed); returns a report."""
+    service = service or SentimentService()
+    texts = [text for text, _ in cases]
+    scores = service.polarity_many(texts)
+    try:
+        from textblob import TextBlob
+        live = [TextBlob(text).sentiment.polarity for text in texts]
+    except Exception:
+        live = [None] * len(texts)
+    failures = [{"text": text, "expected": expected, "textblob": ref, "got": round(got, 4)}
+                for (text, expected), got, ref in zip(cases, scores, live)
+                if abs(got - expected) > tol or (ref is not None and abs(got - ref) > tol)]
+    return {"cases": len(cases), "textblob": live[0] is not None, "failures": failures, "ok": not failures}
+
+
+if __name__ == "__main__":
+    report = parity_check()
+    print(report)
+    sys.exit(0 if report["ok"] else 1)
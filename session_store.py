@@ -0,0 +1,316 @@
+# session_store.py — record interview sessions to disk (frames, audio, per-frame results) and read them back
+#
+# Layout of one session directory:
+#   meta.json                 session id, start time, frame mode, emotion labels, audio format
+#   frames/000000.jpg ...     sampled JPEG frames            (frame_mode="jpeg")
+#   frames.avi                compressed video (MJPG)         (frame_mode="video")
+#   frames-00000.npz ...      frame index columns: ts (float64), index (int64)
+#   results-00000.npz ...     result columns: ts (float64), emotion (uint8 code), confidence (float32)
+#   audio.wav                 16-bit mono PCM of every recorded utterance, back to back
+#   audio-00000.npz ...       utterance columns: start, end (float64 wall clock), offset, frames (int64 in audio.wav)
+#   transcripts.jsonl         one {"ts", "text", "mood"} per line
+#
+# Columns are written in fixed-size chunks, so neither writing nor reading ever holds a whole session in memory.
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import wave
+
+import cv2
+import numpy as np
+
+from frames import Frame
+
+# stored as uint8 codes; anything else (Error, Unknown, No Face ...) maps to "Other"
+LABELS = ("Angry", "Disgust", "Fear", "Happy", "Sad", "Surprise", "Neutral", "Other")
+_CODES = {label: i for i, label in enumerate(LABELS)}
+
+
+def label_code(emotion):
+    return _CODES.get(str(emotion).capitalize(), _CODES["Other"])
+
+
+class ColumnWriter:
+    """Appends rows to preallocated NumPy columns and writes them as <name>-NNNNN.npz every chunk_rows rows."""
+    def __init__(self, directory, name, dtypes, chunk_rows=1024):
+        self.directory = directory
+        self.name = name
+        self.dtypes = dtypes
+        self.chunk_rows = chunk_rows
+        self.chunks = len(glob.glob(os.path.join(directory, f"{name}-*.npz")))
+        self.rows = 0
+        self._cols = {k: np.empty(chunk_rows, dtype=dt) for k, dt in dtypes.items()}
+        self._n = 0
+
+    def append(self, **row):
+        for k, col in self._cols.items():
+            col[self._n] = row[k]
+        self._n += 1
+        self.rows += 1
+        if self._n == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._n:
+            return
+        path = os.path.join(self.directory, f"{self.name}-{self.chunks:05d}.npz")
+        np.savez_compressed(path, **{k: col[:self._n] for k, col in self._cols.items()})
+        self.chunks += 1
+        self._n = 0
+
+
+def iter_columns(directory, name):
+    """Yield {column: array} per stored chunk, in order."""
+    for path in sorted(glob.glob(os.path.join(directory, f"{name}-*.npz"))):
+        with np.load(path) as chunk:
+            yield {k: chunk[k] for k in chunk.files}
+
+
+def read_columns(directory, name):
+    """All chunks of a column set concatenated (fine for results; use iter_columns for long sessions)."""
+    chunks = list(iter_columns(directory, name))
+    if not chunks:
+        return {}
+    return {k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]}
+
+
+class SessionRecorder:
+    """
+    Records one session under root/session_id, a new directory (FileExistsError if it exists).
+    add_* calls only enqueue; JPEG/video encoding and file writes happen on a background writer
+    thread. When the writer falls behind, frames (never results or audio) are dropped.
+    """
+    def __init__(self, root="sessions", session_id=None, frame_mode="jpeg", frame_interval=0.5,
+                 jpeg_quality=80, video_fps=None, chunk_rows=1024, max_pending=64):
+        if frame_mode not in ("jpeg", "video"):
+            raise ValueError(f"Unknown frame_mode: {frame_mode}")
+        # the random suffix keeps sessions started in the same second (two browser tabs) apart
+        self.session_id = session_id or f"{time.strftime('session-%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(root, self.session_id)
+        os.makedirs(root, exist_ok=True)
+        os.makedirs(self.path)    # never append to (and overwrite chunks of) another session's directory
+        if frame_mode == "jpeg":
+            os.makedirs(os.path.join(self.path, "frames"))
+        self.frame_mode = frame_mode
+        self.frame_interval = frame_interval
+        self.jpeg_quality = jpeg_quality
+        self.video_fps = video_fps or (1.0 / frame_interval if frame_interval else 15.0)
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.closed = False
+        self._last_frame_ts = 0.0
+        self._frame_cols = ColumnWriter(self.path, "frames", {"ts": np.float64, "index": np.int64}, chunk_rows)
+        self._result_cols = ColumnWriter(self.path, "results", {"ts": np.float64, "emotion": np.uint8,
+                                                                 "confidence": np.float32}, chunk_rows)
+        self._audio_cols = ColumnWriter(self.path, "audio", {"start": np.float64, "end": np.float64,
+                                                             "offset": np.int64, "frames": np.int64}, chunk_rows)
+        self._video = None
+        self._video_size = None     # (width, height) of frames.avi, set by the first frame
+        self._wav = None
+        self._audio_frames = 0
+        self._queue = queue.Queue()
+        self._pending_frames = threading.Semaphore(max_pending)
+        self._write_meta(started=time.time())
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    # ---- producers (any thread)
+    def add_frame(self, ts, frame):
+        """Queue a BGR frame (frames.Frame or ndarray); sampled to at most one per frame_interval seconds."""
+        if self.closed or ts - self._last_frame_ts < self.frame_interval:
+            return False
+        if not self._pending_frames.acquire(blocking=False):
+            self.frames_dropped += 1
+            return False
+        self._last_frame_ts = ts
+        self._queue.put(("frame", ts, frame))
+        return True
+
+    def add_result(self, ts, emotion, confidence):
+        if not self.closed:
+            self._queue.put(("result", ts, emotion, confidence))
+
+    def add_audio(self, segment):
+        """Append one audio_capture.Segment to audio.wav."""
+        if not self.closed:
+            self._queue.put(("audio", segment))
+
+    def add_transcript(self, text, mood, ts=None):
+        if not self.closed:
+            self._queue.put(("transcript", time.time() if ts is None else ts, text, mood))
+
+    def close(self, timeout=10.0):
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # ---- writer thread
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                getattr(self, "_write_" + item[0])(*item[1:])
+            except Exception as e:
+                print("Session recorder error:", e)
+            finally:
+                if item[0] == "frame":
+                    self._pending_frames.release()
+        for cols in (self._frame_cols, self._result_cols, self._audio_cols):
+            cols.flush()
+        if self._video is not None:
+            self._video.release()
+        if self._wav is not None:
+            self._wav.close()
+        self._write_meta(ended=time.time(), frames=self.frames_written, frames_dropped=self.frames_dropped,
+                         results=self._result_cols.rows, utterances=self._audio_cols.rows)
+
+    def _write_frame(self, ts, frame):
+        frame = frame.data if isinstance(frame, Frame) else frame
+        index = self.frames_written
+        if self.frame_mode == "jpeg":
+            ok = cv2.imwrite(os.path.join(self.path, "frames", f"{index:06d}.jpg"), frame,
+                             [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                return
+        else:
+            if self._video is None:
+                h, w = frame.shape[:2]
+                self._video_size = (w, h)
+                self._video = cv2.VideoWriter(os.path.join(self.path, "frames.avi"),
+                                              cv2.VideoWriter_fourcc(*"MJPG"), self.video_fps, (w, h))
+            if frame.shape[1::-1] != self._video_size:
+                # VideoWriter silently skips frames of another size, which would shift every later index
+                frame = cv2.resize(frame, self._video_size, interpolation=cv2.INTER_AREA)
+            self._video.write(frame)
+        self._frame_cols.append(ts=ts, index=index)
+        self.frames_written += 1
+
+    def _write_result(self, ts, emotion, confidence):
+        self._result_cols.append(ts=ts, emotion=label_code(emotion), confidence=float(confidence))
+
+    def _write_audio(self, segment):
+        if self._wav is None:
+            self._wav = wave.open(os.path.join(self.path, "audio.wav"), "wb")
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(segment.sample_width)
+            self._wav.setframerate(segment.sample_rate)
+            self._write_meta(sample_rate=segment.sample_rate, sample_width=segment.sample_width)
+        n = len(segment.pcm) // segment.sample_width
+        self._wav.writeframes(segment.pcm)
+        self._audio_cols.append(start=segment.start, end=segment.end, offset=self._audio_frames, frames=n)
+        self._audio_frames += n
+
+    def _write_transcript(self, ts, text, mood):
+        with open(os.path.join(self.path, "transcripts.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": ts, "text": text, "mood": mood}) + "\n")
+
+    def _write_meta(self, **fields):
+        path = os.path.join(self.path, "meta.json")
+        meta = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                meta = json.load(f)
+        meta.setdefault("session_id", self.session_id)
+        meta.setdefault("frame_mode", self.frame_mode)
+        meta.setdefault("labels", list(LABELS))
+        meta.update(fields)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+
+class SessionReader:
+    """Streaming access to a recorded session: frames, results and audio are read chunk by chunk."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.session_id = self.meta.get("session_id", os.path.basename(path))
+        self.labels = tuple(self.meta.get("labels", LABELS))
+
+    def iter_frame_index(self):
+        """Yield (ts, index) arrays chunk by chunk."""
+        for chunk in iter_columns(self.path, "frames"):
+            yield chunk["ts"], chunk["index"]
+
+    def frame_path(self, index):
+        return os.path.join(self.path, "frames", f"{int(index):06d}.jpg")
+
+    def read_frame(self, index, cap=None):
+        """One BGR Frame by index (pass an open cv2.VideoCapture to reuse it in video mode)."""
+        if self.meta.get("frame_mode") == "video":
+            own = cap is None
+            cap = cap or cv2.VideoCapture(os.path.join(self.path, "frames.avi"))
+            try:
+                if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != int(index):
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+                ok, img = cap.read()
+            finally:
+                if own:
+                    cap.release()
+            return Frame(img, "BGR") if ok else None
+        img = cv2.imread(self.frame_path(index))
+        return Frame(img, "BGR") if img is not None else None
+
+    def iter_frames(self):
+        """Yield (ts, Frame) one at a time."""
+        cap = None
+        if self.meta.get("frame_mode") == "video":
+            cap = cv2.VideoCapture(os.path.join(self.path, "frames.avi"))
+        try:
+            for ts, index in self.iter_frame_index():
+                for t, i in zip(ts, index):
+                    frame = self.read_frame(i, cap)
+                    if frame is not None:
+                        yield float(t), frame
+        finally:
+            if cap is not None:
+                cap.release()
+
+    def iter_results(self):
+        """Yield (ts, emotion_code, confidence) column chunks; labels[code] gives the name."""
+        for chunk in iter_columns(self.path, "results"):
+            yield chunk["ts"], chunk["emotion"], chunk["confidence"]
+
+    def results(self):
+        return read_columns(self.path, "results")
+
+    def iter_utterances(self):
+        """Yield (start, end, offset, frames) for every recorded utterance in audio.wav."""
+        for chunk in iter_columns(self.path, "audio"):
+            for row in zip(chunk["start"], chunk["end"], chunk["offset"], chunk["frames"]):
+                yield tuple(float(v) for v in row[:2]) + tuple(int(v) for v in row[2:])
+
+    def read_audio(self, offset, frames):
+        """Raw PCM of frames samples starting at offset, plus (sample_rate, sample_width)."""
+        with wave.open(os.path.join(self.path, "audio.wav"), "rb") as w:
+            w.setpos(offset)
+            return w.readframes(frames), w.getframerate(), w.getsampwidth()
+
+    def transcripts(self):
+        path = os.path.join(self.path, "transcripts.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+def list_sessions(root="sessions"):
+    """Session directories under root (or root itself if it is one), oldest first."""
+    if os.path.exists(os.path.join(root, "meta.json")):
+        return [root]
+    return sorted(os.path.dirname(p) for p in glob.glob(os.path.join(root, "*", "meta.json")))
@@ -1,25 +1,72 @@
 ﻿# speech_analysis.py
-import speech_recognition as sr
-from textblob import TextBlob
+import asr
+import sentiment
 
-def record_and_analyze(duration=5):
+
+def _label(polarity):
+    return "Positive" if polarity > 0 else "Negative" if polarity < 0 else "Neutral"
+
+
+def _mood(text):
+    return _label(sentiment.polarity(text))
+
+
+def stream_and_analyze(duration=5, on_partial=None, backend=None, on_mood=None):
     """
-    Record from microphone for ~duration seconds and return (text, mood).
-    mood: 'Positive' / 'Neutral' / 'Negative' or 'Error: ...'
+    Stream the microphone into the ASR backend for ~duration seconds and return (text, mood).
+    on_partial(text) receives the running transcript while the candidate is still speaking
+    (offline streaming backends only). on_mood(mood) gets the running mood of those partials,
+    scored incrementally. backend: asr backend name/instance, default asr.get_backend().
     """
-    recognizer = sr.Recognizer()
+    if on_mood is not None:
+        running = sentiment.get_service().incremental()
+        user_partial = on_partial
+
+        def on_partial(text):
+            if user_partial is not None:
+                user_partial(text)
+            on_mood(_label(running.update(text)))
+    try:
+        print(f"Listening for {duration} seconds...")
+        text = asr.transcribe_microphone(duration, on_partial=on_partial, backend=backend)
+    except Exception as e:
+        return None, f"Error: {e}"
+
+    if not text:
+        return None, "Error: no speech recognized"
     try:
-        with sr.Microphone() as source:
-            recognizer.adjust_for_ambient_noise(source, duration=0.8)
-            print(f"Listening for {duration} seconds...")
-            audio = recognizer.listen(source, phrase_time_limit=duration)
+        return text, _mood(text)
     except Exception as e:
         return None, f"Error: {e}"
 
+
+def record_and_analyze(duration=5):
+    """
+    Record from microphone for ~duration seconds and return (text, mood).
+    mood: 'Positive' / 'Neutral' / 'Negative' or 'Error: ...'
+    """
+    return stream_and_analyze(duration)
+
+
+def analyze_segment(segment, backend=None):
+    """
+    Transcribe one finished utterance from audio_capture.AudioCaptureService.
+    Returns (text, mood), or None when nothing was recognized.
+    """
+    session = asr.get_backend(backend).session(segment.sample_rate, segment.sample_width)
+    session.accept(segment.pcm)
+    text = session.finish()
+    if not text:
+        return None
+    return text, _mood(text)
+
+
+def summarize_answer(results):
+    """[(text, mood), ...] of one answer -> (full_text, mood of the whole answer) like record_and_analyze."""
+    text = " ".join(t for t, _ in results if t)
+    if not text:
+        return None, "Error: no speech recognized"
     try:
-        text = recognizer.recognize_google(audio)
-        polarity = TextBlob(text).sentiment.polarity
-        mood = "Positive" if polarity > 0 else "Negative" if polarity < 0 else "Neutral"
-        return text, mood
+        return text, _mood(text)
     except Exception as e:
         return None, f"Error: {e}"
@@ -1,20 +1,22 @@
-import speech_recognition as sr
+import asr
+
 
 def listen_and_transcribe(timeout=5, phrase_time_limit=8):
-    r = sr.Recognizer()
-    mic = sr.Microphone()
-    print("Calibrating microphone for 1 second...")
-    with mic as source:
-        r.adjust_for_ambient_noise(source, duration=1)
-        print("Please speak now...")
-        audio = r.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+    """
+    Transcribe up to phrase_time_limit seconds of speech, printing partial transcripts as they arrive.
+    Returns "" if no speech starts within timeout seconds.
+    """
+    print("Please speak now...")
     try:
-        text = r.recognize_google(audio)
-        print("Transcription:", text)
-        return text
-    except sr.UnknownValueError:
-        print("Could not understand audio")
+        text = asr.transcribe_microphone(phrase_time_limit, on_partial=lambda t: print("...", t), start_timeout=timeout)
+    except TimeoutError:
+        print(f"No speech detected within {timeout} seconds")
         return ""
-    except sr.RequestError as e:
-        print("Could not request results; check internet:", e)
+    except Exception as e:
+        print("Could not transcribe audio:", e)
+        return ""
+    if not text:
+        print("Could not understand audio")
         return ""
+    print("Transcription:", text)
+    return text
@@ -1,5 +1,6 @@
 # test_fer.py
 import cv2
+from frames import Frame
 from emotion_analysis import analyze_emotion
 
 cap = cv2.VideoCapture(0)
@@ -13,9 +14,7 @@ while True:
     if not ret:
         print("FRAME FAIL")
         break
-    # convert to RGB because analyze_emotion expects RGB-like frame resizing
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    emo = analyze_emotion(rgb)
+    emo = analyze_emotion(Frame(frame, "BGR"))
     print("Detected Emotion:", emo)
     cv2.imshow("test_fer - press q to quit", frame)
     if cv2.waitKey(1) & 0xFF == ord('q'):
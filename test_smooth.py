@@ -1,5 +1,6 @@
 # test_smooth.py
 import cv2
+from frames import Frame
 from emotion_analysis import analyze_emotion, EmotionSmoother
 
 cap = cv2.VideoCapture(0)
@@ -13,8 +14,7 @@ while True:
     ret, frame = cap.read()
     if not ret:
         break
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    emo, conf = analyze_emotion(rgb)
+    emo, conf = analyze_emotion(Frame(frame, "BGR"))
     smoother.update(emo, conf)
     stable_emo, avg_conf = smoother.get_stable_emotion()
     print(f"Frame: {emo} ({conf}) | Stable: {stable_emo} ({avg_conf})")
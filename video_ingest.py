@@ -0,0 +1,222 @@
+# video_ingest.py — analyze an uploaded / recorded answer (MP4, WebM, ...) instead of a live webcam
+#
+#   python video_ingest.py answer.mp4 --rate 2 [--multi-face] [--timeline out/timeline]
+#
+# Frames are decoded as a stream and sampled at `rate` analyses per second; only the sampled
+# frames are converted to arrays, downscaled and kept — at most batch_size of them at a time —
+# so memory stays flat however long the recording is. With PyAV (pip install av):
+#   - sparse sampling (gap >= seek_gap_s) seeks to the keyframe before each target instead of
+#     decoding everything in between;
+#   - keyframes_only=True decodes keyframes only (cheapest, rate = the file's keyframe rate).
+# Without PyAV, cv2.VideoCapture is used: skipped frames are grab()bed (demuxed/decoded but never
+# converted or copied) and only sampled frames are retrieve()d.
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+
+from frames import Frame
+
+try:
+    import av
+    AV_AVAILABLE = True
+except Exception:
+    AV_AVAILABLE = False
+
+VIDEO_TYPES = ("mp4", "webm", "mov", "mkv", "avi", "m4v")
+
+
+def _downscale(bgr, max_width):
+    h, w = bgr.shape[:2]
+    if w <= max_width:
+        return bgr
+    return cv2.resize(bgr, (max_width, max(1, round(h * max_width / w))), interpolation=cv2.INTER_AREA)
+
+
+def _next_target(target, ts, interval):
+    """Next sample time after a frame at ts (never in the past, so sparse frames do not cause bursts)."""
+    target += interval
+    while target <= ts:
+        target += interval
+    return target
+
+
+def probe(path):
+    """{"duration_s", "fps", "backend", "codec"} of a video file (duration/fps None when unknown)."""
+    if AV_AVAILABLE:
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            duration = None
+            if stream.duration is not None and stream.time_base is not None:
+                duration = float(stream.duration * stream.time_base)
+            elif container.duration is not None:
+                duration = container.duration / 1e6
+            fps = float(stream.average_rate) if stream.average_rate else None
+            return {"duration_s": duration, "fps": fps, "backend": "pyav", "codec": stream.codec_context.name}
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or None
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        duration = frames / fps if fps and frames > 0 else None
+        return {"duration_s": duration, "fps": fps, "backend": "opencv", "codec": None}
+    finally:
+        cap.release()
+
+
+def _iter_av(path, rate, max_width, keyframes_only, seek_gap_s):
+    interval = 1.0 / rate
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        if keyframes_only:
+            stream.codec_context.skip_frame = "NONKEY"
+        seek = interval >= seek_gap_s and not keyframes_only and stream.time_base is not None
+        target = 0.0
+        while True:
+            if seek and target > 0:
+                # lands on the keyframe at or before target; frames before it are never decoded
+                container.seek(int(target / stream.time_base), stream=stream, backward=True, any_frame=False)
+            found = False
+            for frame in container.decode(stream):
+                if frame.time is None or frame.time < target:
+                    continue      # decoded (needed as a reference) but never converted
+                yield frame.time, Frame(_downscale(frame.to_ndarray(format="bgr24"), max_width), "BGR")
+                target = _next_target(target, frame.time, interval)
+                if seek:
+                    found = True
+                    break
+            if not (seek and found):
+                return
+
+
+def _iter_cv2(path, rate, max_width):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {path}")
+    interval = 1.0 / rate
+    target = 0.0
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    index = 0
+    try:
+        while cap.grab():
+            # POS_MSEC is missing in some WebM files: fall back to index / fps
+            ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 or (index / fps if fps else 0.0)
+            index += 1
+            if ts + 1e-6 < target:
+                continue
+            ok, bgr = cap.retrieve()
+            if not ok:
+                continue
+            yield ts, Frame(_downscale(bgr, max_width), "BGR")
+            target = _next_target(target, ts, interval)
+    finally:
+        cap.release()
+
+
+def iter_frames(path, rate=2.0, max_width=640, keyframes_only=False, seek_gap_s=2.0):
+    """Yield (seconds, BGR Frame) sampled at about `rate` per second, decoding as little as the container allows."""
+    if AV_AVAILABLE:
+        return _iter_av(path, rate, max_width, keyframes_only, seek_gap_s)
+    return _iter_cv2(path, rate, max_width)
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest(path, rate=2.0, batch_size=16, max_width=640, multi_face=False, keyframes_only=False,
+           session=None):
+    """
+    Analyze a video file progressively. Yields one list per batch of
+    [(seconds, EmotionResult), ...] (multi_face: one entry per face, results carry face_id).
+    Sampled frames go through the batched emotion path, or through the configured dispatcher
+    (emotion_analysis.set_dispatcher: inference pool or server) when there is one; at most
+    batch_size frames are held at once. Multi-face mode always runs in-process.
+    """
+    from emotion_analysis import analyze_emotions_batch_result, analyze_faces_batch
+    from face_tracking import MultiFaceTracker
+
+    session = session or f"video:{os.path.abspath(path)}"
+    # sampled frames are too far apart for template tracking: detect on every one, keep ids by IoU
+    tracker = MultiFaceTracker(redetect_every=0) if multi_face else None
+    frames = iter_frames(path, rate, max_width, keyframes_only)
+    for batch in _batches(frames, batch_size):
+        times = [ts for ts, _ in batch]
+        if multi_face:
+            per_frame = analyze_faces_batch([frame for _, frame in batch], tracker)
+            yield [(ts, r) for ts, results in zip(times, per_frame) for r in results]
+        else:
+            results = analyze_emotions_batch_result([frame for _, frame in batch], session=session)
+            yield list(zip(times, results))
+
+
+def analyze_file(path, rate=2.0, batch_size=16, multi_face=False, keyframes_only=False, timeline=None,
+                 on_progress=None):
+    """
+    Run ingest() to the end; appends to timeline (an EmotionTimeline, optional) and calls
+    on_progress(seconds_done, results_of_batch) after every batch. Returns a summary dict.
+    """
+    from emotion_analysis import IGNORED_LABELS
+
+    t0 = time.perf_counter()
+    counts = {}
+    analyzed = 0
+    last_ts = 0.0
+    for results in ingest(path, rate, batch_size, multi_face=multi_face, keyframes_only=keyframes_only):
+        for ts, r in results:
+            counts[r.label] = counts.get(r.label, 0) + 1
+            if timeline is not None:
+                timeline.append(ts, r.label, r.confidence, probs=r.probs)
+            last_ts = max(last_ts, ts)
+        analyzed += len(results)
+        if on_progress is not None:
+            on_progress(last_ts, results)
+    if timeline is not None:
+        timeline.flush()
+    emotions = {k: v for k, v in counts.items() if k not in IGNORED_LABELS}
+    return {"path": path, "analyzed": analyzed, "video_s": round(last_ts, 2),
+            "elapsed_s": round(time.perf_counter() - t0, 2), "emotions": counts,
+            "dominant": max(emotions, key=emotions.get) if emotions else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze emotions in a recorded answer (video file).")
+    parser.add_argument("path")
+    parser.add_argument("--rate", type=float, default=2.0, help="analyses per second of video")
+    parser.add_argument("--batch", type=int, default=16, help="frames per forward pass")
+    parser.add_argument("--multi-face", action="store_true", help="analyze every face (panel / group recordings)")
+    parser.add_argument("--keyframes-only", action="store_true", help="decode keyframes only (PyAV)")
+    parser.add_argument("--timeline", help="write the results as an EmotionTimeline to this directory")
+    args = parser.parse_args(argv)
+
+    timeline = None
+    if args.timeline:
+        from emotion_timeline import EmotionTimeline
+        timeline = EmotionTimeline(path=args.timeline)
+    info = probe(args.path)
+
+    def progress(done, _):
+        if info["duration_s"]:
+            print(f"\r{min(100.0, 100.0 * done / info['duration_s']):5.1f}%", end="", file=sys.stderr, flush=True)
+
+    summary = analyze_file(args.path, args.rate, args.batch, args.multi_face, args.keyframes_only, timeline, progress)
+    print(file=sys.stderr)
+    summary.update(probe=info)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import time
+
+import streamlit as st
+from streamlit_webrtc import webrtc_streamer, RTCConfiguration
+
+from live_emotion import EmotionVideoProcessor
+from model_registry import warm_models
+
+st.title("🎥 WebRTC Live Emotion")
+st.write("Live video with emotion analysis on every few frames; the overlay shows the last known result.")
+
+rtc_config = RTCConfiguration({
+    "iceServers": [{"urls": ["stun:stun.l.google.com:19302"]}]
+})
+
+# warm models once per process so the first analyzed frame doesn't stall
+@st.cache_resource(show_spinner="Loading emotion models...")
+def load_models():
+    return warm_models()
+
+load_models()
+
+ctx = webrtc_streamer(
+    key="live-emotion",
+    rtc_configuration=rtc_config,
+    video_processor_factory=EmotionVideoProcessor,
+    media_stream_constraints={"video": True, "audio": False},
+    async_processing=True,
+)
+
+status = st.empty()
+while ctx.state.playing:
+    if ctx.video_processor:
+        s = ctx.video_processor.stats()
+        status.info(f"Stable: {s['stable'][0]} ({s['stable'][1]}) — analyzing every {s['skip']} frame(s), "
+                    f"{s['fps']} fps in, inference {s['latency_s']}s")
+    time.sleep(0.5)
@@ -2,6 +2,7 @@ import streamlit as st
 from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, RTCConfiguration
 import av
 import cv2
+import numpy as np
 
 st.title("🎥 WebRTC H264 Test (Final Codec Fix)")
 
@@ -12,11 +13,13 @@ rtc_config = RTCConfiguration({
 })
 
 class H264Transformer(VideoTransformerBase):
-    def transform(self, frame: av.VideoFrame) -> av.VideoFrame:
+    def transform(self, frame: av.VideoFrame) -> np.ndarray:
+        # draw in place on the decoded array; streamlit-webrtc wraps the returned
+        # ndarray into a VideoFrame itself, so no extra from_ndarray copy here
         img = frame.to_ndarray(format="bgr24")
         cv2.putText(img, "H.264 Test - Working Stream", (50, 100),
                     cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-        return av.VideoFrame.from_ndarray(img, format="bgr24")
+        return img
 
 # Include force codec constraint
 webrtc_streamer(
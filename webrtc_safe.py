@@ -2,6 +2,7 @@ import streamlit as st
 from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, RTCConfiguration
 import av
 import cv2
+import numpy as np
 
 st.title("🧩 WebRTC Safe Mode Test")
 
@@ -10,12 +11,14 @@ rtc_config = RTCConfiguration({
 })
 
 class SafeTransformer(VideoTransformerBase):
-    def transform(self, frame: av.VideoFrame) -> av.VideoFrame:
+    def transform(self, frame: av.VideoFrame) -> np.ndarray:
+        # draw in place on the decoded array; streamlit-webrtc wraps the returned
+        # ndarray into a VideoFrame itself, so no extra from_ndarray copy here
         img = frame.to_ndarray(format="bgr24")
         cv2.rectangle(img, (100, 100), (300, 300), (0, 255, 0), 3)
         cv2.putText(img, "SAFE MODE", (120, 90),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
-        return av.VideoFrame.from_ndarray(img, format="bgr24")
+        return img
 
 webrtc_streamer(
     key="safe",